@@ -1,11 +1,29 @@
 import asyncio
+import email.message
 import json
 import logging
+import os
+from collections.abc import Callable, Coroutine
 from contextlib import asynccontextmanager
-
-from fastapi import FastAPI, Query, WebSocket, WebSocketDisconnect
+from typing import Any, Literal
+
+import orjson
+from fastapi import (
+    Depends,
+    FastAPI,
+    Query,
+    Request,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter, ValidationError
+from starlette.exceptions import HTTPException
 
 import tank_sim
 
@@ -19,9 +37,10 @@ from .models import (
 )
 from .simulation import SimulationManager
 
-# Configure logging
+# Configure logging. Defaults to WARNING so per-request INFO messages are
+# skipped in production; set LOG_LEVEL=INFO (or DEBUG) to see them.
 logging.basicConfig(
-    level=logging.INFO,
+    level=os.getenv("LOG_LEVEL", "WARNING").upper(),
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
 )
 logger = logging.getLogger(__name__)
@@ -32,6 +51,14 @@ simulation_manager: SimulationManager | None = None
 # Track the background simulation loop task
 simulation_task: asyncio.Task | None = None
 
+# Static health check body, encoded once
+HEALTH_OK = orjson.dumps({"status": "ok"})
+RESET_OK = orjson.dumps({"message": "Simulation reset successfully"})
+
+# Setpoint changes are the most frequent command, so /api/setpoint validates
+# the raw body with a prebuilt adapter instead of FastAPI's body resolution
+_setpoint_adapter = TypeAdapter(SetpointCommand)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -51,7 +78,7 @@ async def lifespan(app: FastAPI):
         logger.info("Simulation loop started")
 
     except Exception as e:
-        logger.error(f"Failed to initialize simulation manager: {e}")
+        logger.error("Failed to initialize simulation manager: %s", e)
         raise
 
     yield
@@ -74,6 +101,7 @@ app = FastAPI(
     description="Real-time tank level control simulation with PID control",
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Enable CORS middleware
@@ -88,180 +116,334 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses (mainly /api/history). Level 1 keeps CPU cost low;
+# repetitive JSON already shrinks several-fold at the lowest setting.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=1)
+
+
+class SimulationNotInitializedError(RuntimeError):
+    """Raised when a request arrives before the simulation manager is ready."""
+
+
+async def require_sim() -> SimulationManager:
+    """Dependency returning the initialized simulation manager."""
+    if simulation_manager is None or not simulation_manager.initialized:
+        raise SimulationNotInitializedError("Simulation not initialized")
+    return simulation_manager
+
+
+@app.exception_handler(SimulationNotInitializedError)
+async def simulation_not_initialized_handler(
+    request: Request, exc: SimulationNotInitializedError
+):
+    return ORJSONResponse(status_code=500, content={"error": str(exc)})
+
+
+class ErrorResponseRoute(APIRoute):
+    """Route that turns unexpected errors into a 500 {"error": ...} response.
+
+    A catch-all Exception handler would run in Starlette's server-error
+    middleware, outside CORSMiddleware, so the browser could not read the
+    error body. Catching here keeps the response inside the middleware stack.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        route_handler = super().get_route_handler()
+
+        async def error_response_handler(request: Request) -> Response:
+            try:
+                return await route_handler(request)
+            except (
+                HTTPException,
+                RequestValidationError,
+                SimulationNotInitializedError,
+            ):
+                # Handled by the app's exception handlers
+                raise
+            except Exception as e:
+                logger.error(
+                    "Error handling %s %s: %s", request.method, request.url.path, e
+                )
+                return ORJSONResponse(status_code=500, content={"error": str(e)})
+
+        return error_response_handler
+
+
+app.router.route_class = ErrorResponseRoute
+
+
+def _is_json_content_type(content_type: str | None) -> bool:
+    """Apply FastAPI's rule for which request bodies are decoded as JSON."""
+    if not content_type or content_type == "application/json":
+        return True
+    message = email.message.Message()
+    message["content-type"] = content_type
+    if message.get_content_maintype() != "application":
+        return False
+    subtype = message.get_content_subtype()
+    return subtype == "json" or subtype.endswith("+json")
+
+
+async def _read_setpoint_body(request: Request) -> SetpointCommand:
+    """
+    Validate the /api/setpoint body with the prebuilt adapter.
+
+    A well-formed JSON body is validated straight from the raw bytes. Any
+    other body is rejected the way FastAPI rejects it for a declared body
+    parameter, so clients get the same 400 and 422 responses as on the
+    other command endpoints.
+    """
+    body = await request.body()
+    if not body:
+        # FastAPI reports an empty body as a missing required body
+        raise RequestValidationError(
+            [
+                {
+                    "type": "missing",
+                    "loc": ("body",),
+                    "msg": "Field required",
+                    "input": None,
+                }
+            ]
+        )
+    data: Any = body
+    if _is_json_content_type(request.headers.get("content-type")):
+        try:
+            return _setpoint_adapter.validate_json(body)
+        except ValidationError:
+            pass
+        # Error path only: decode with the json module, as FastAPI does, so
+        # the error carries the same message and position
+        try:
+            data = json.loads(body)
+        except json.JSONDecodeError as e:
+            raise RequestValidationError(
+                [
+                    {
+                        "type": "json_invalid",
+                        "loc": ("body", e.pos),
+                        "msg": "JSON decode error",
+                        "input": {},
+                        "ctx": {"error": e.msg},
+                    }
+                ],
+                body=e.doc,
+            ) from e
+        except ValueError as e:
+            # Not decodable as text at all (for example invalid UTF-8)
+            raise HTTPException(
+                status_code=400, detail="There was an error parsing the body"
+            ) from e
+    # FastAPI validates body parameters with from_attributes=True, and a
+    # non-JSON content type leaves the body as raw bytes
+    try:
+        return _setpoint_adapter.validate_python(data, from_attributes=True)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**err, "loc": ("body", *err["loc"])} for err in e.errors()]
+        ) from e
+
 
 # REST Endpoints
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint for monitoring."""
-    return {"status": "ok"}
+    return Response(content=HEALTH_OK, media_type="application/json")
 
 
 @app.get("/api/state", response_model=SimulationState)
-async def get_state():
+async def get_state(sim: SimulationManager = Depends(require_sim)):
     """Get current simulation state snapshot."""
-    try:
-        if simulation_manager is None or not simulation_manager.initialized:
-            return JSONResponse(
-                status_code=500, content={"error": "Simulation not initialized"}
-            )
-
-        state = simulation_manager.get_state()
-        return state
-    except Exception as e:
-        logger.error(f"Error getting state: {e}")
-        return JSONResponse(status_code=500, content={"error": str(e)})
+    return sim.get_state()
 
 
 @app.get("/api/config", response_model=ConfigResponse)
-async def get_config():
+async def get_config(sim: SimulationManager = Depends(require_sim)):
     """Get current simulation configuration."""
-    try:
-        if simulation_manager is None or not simulation_manager.initialized:
-            return JSONResponse(
-                status_code=500, content={"error": "Simulation not initialized"}
-            )
-
-        config = simulation_manager.config
-        model_params = config.model_params
-        controller = config.controllers[0]
-        gains = controller.gains
-
-        return {
-            "tank_height": model_params.max_height,
-            "tank_area": model_params.area,
-            "valve_coefficient": model_params.k_v,
-            "initial_level": config.initial_state[0],
-            "initial_setpoint": controller.initial_setpoint,
-            "pid_gains": {
-                "Kc": gains.Kc,
-                "tau_I": gains.tau_I,
-                "tau_D": gains.tau_D,
-            },
-            "timestep": config.dt,
-            "history_capacity": 7200,
-            "history_size": len(simulation_manager.history),
-        }
-    except Exception as e:
-        logger.error(f"Error getting config: {e}")
-        return JSONResponse(status_code=500, content={"error": str(e)})
+    # Pre-serialized at startup; skips dict building and validation
+    return Response(content=sim.config_bytes, media_type="application/json")
 
 
-@app.post("/api/reset")
-async def reset_simulation():
+@app.post("/api/reset", response_model=None)
+async def reset_simulation(sim: SimulationManager = Depends(require_sim)):
     """Reset simulation to initial steady state."""
-    try:
-        if simulation_manager is None or not simulation_manager.initialized:
-            return JSONResponse(
-                status_code=500, content={"error": "Simulation not initialized"}
-            )
-
-        simulation_manager.reset()
-        logger.info("Simulation reset")
-        return {"message": "Simulation reset successfully"}
-    except Exception as e:
-        logger.error(f"Error resetting simulation: {e}")
-        return JSONResponse(status_code=500, content={"error": str(e)})
-
-
-@app.post("/api/setpoint")
-async def set_setpoint(command: SetpointCommand):
+    sim.reset()
+    logger.info("Simulation reset")
+    return Response(content=RESET_OK, media_type="application/json")
+
+
+@app.post(
+    "/api/setpoint",
+    response_model=None,
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {"schema": SetpointCommand.model_json_schema()}
+            },
+            "required": True,
+        }
+    },
+)
+async def set_setpoint(request: Request, sim: SimulationManager = Depends(require_sim)):
     """Update the simulation setpoint."""
-    try:
-        if simulation_manager is None or not simulation_manager.initialized:
-            return JSONResponse(
-                status_code=500, content={"error": "Simulation not initialized"}
-            )
-
-        simulation_manager.set_setpoint(command.value)
-        logger.info(f"Setpoint changed to {command.value}")
-        return {"message": "Setpoint updated", "value": command.value}
-    except Exception as e:
-        logger.error(f"Error setting setpoint: {e}")
-        return JSONResponse(status_code=500, content={"error": str(e)})
+    command = await _read_setpoint_body(request)
+    sim.set_setpoint(command.value)
+    logger.info("Setpoint changed to %s", command.value)
+    return ORJSONResponse({"message": "Setpoint updated", "value": command.value})
 
 
-@app.post("/api/pid")
-async def set_pid_gains(command: PIDTuningCommand):
+@app.post("/api/pid", response_model=None)
+async def set_pid_gains(
+    command: PIDTuningCommand, sim: SimulationManager = Depends(require_sim)
+):
     """Update PID controller gains."""
-    try:
-        if simulation_manager is None or not simulation_manager.initialized:
-            return JSONResponse(
-                status_code=500, content={"error": "Simulation not initialized"}
-            )
-
-        gains = tank_sim.PIDGains()
-        gains.Kc = command.Kc
-        gains.tau_I = command.tau_I
-        gains.tau_D = command.tau_D
-        simulation_manager.set_pid_gains(gains)
-        logger.info(
-            f"PID gains updated: Kc={command.Kc}, tau_I={command.tau_I}, tau_D={command.tau_D}"
-        )
-        return {
+    gains = tank_sim.PIDGains()
+    gains.Kc = command.Kc
+    gains.tau_I = command.tau_I
+    gains.tau_D = command.tau_D
+    sim.set_pid_gains(gains)
+    logger.info(
+        "PID gains updated: Kc=%s, tau_I=%s, tau_D=%s",
+        command.Kc,
+        command.tau_I,
+        command.tau_D,
+    )
+    return ORJSONResponse(
+        {
             "message": "PID gains updated",
             "gains": {"Kc": command.Kc, "tau_I": command.tau_I, "tau_D": command.tau_D},
         }
-    except Exception as e:
-        logger.error(f"Error setting PID gains: {e}")
-        return JSONResponse(status_code=500, content={"error": str(e)})
+    )
 
 
-@app.post("/api/inlet_flow")
-async def set_inlet_flow(command: InletFlowCommand):
+@app.post("/api/inlet_flow", response_model=None)
+async def set_inlet_flow(
+    command: InletFlowCommand, sim: SimulationManager = Depends(require_sim)
+):
     """Update inlet flow rate."""
-    try:
-        if simulation_manager is None or not simulation_manager.initialized:
-            return JSONResponse(
-                status_code=500, content={"error": "Simulation not initialized"}
-            )
-
-        simulation_manager.set_inlet_flow(command.value)
-        logger.info(f"Inlet flow changed to {command.value}")
-        return {"message": "Inlet flow updated", "value": command.value}
-    except Exception as e:
-        logger.error(f"Error setting inlet flow: {e}")
-        return JSONResponse(status_code=500, content={"error": str(e)})
+    sim.set_inlet_flow(command.value)
+    logger.info("Inlet flow changed to %s", command.value)
+    return ORJSONResponse({"message": "Inlet flow updated", "value": command.value})
 
 
-@app.post("/api/inlet_mode")
-async def set_inlet_mode(command: InletModeCommand):
+@app.post("/api/inlet_mode", response_model=None)
+async def set_inlet_mode(
+    command: InletModeCommand, sim: SimulationManager = Depends(require_sim)
+):
     """Switch inlet between constant and Brownian modes."""
-    try:
-        if simulation_manager is None or not simulation_manager.initialized:
-            return JSONResponse(
-                status_code=500, content={"error": "Simulation not initialized"}
-            )
-
-        simulation_manager.set_inlet_mode(
-            command.mode, command.min, command.max, command.variance
-        )
-        logger.info(f"Inlet mode changed to {command.mode}")
-        return {
+    sim.set_inlet_mode(command.mode, command.min, command.max, command.variance)
+    logger.info("Inlet mode changed to %s", command.mode)
+    return ORJSONResponse(
+        {
             "message": "Inlet mode updated",
             "mode": command.mode,
             "min": command.min,
             "max": command.max,
             "variance": command.variance,
         }
-    except Exception as e:
-        logger.error(f"Error setting inlet mode: {e}")
-        return JSONResponse(status_code=500, content={"error": str(e)})
+    )
 
 
 @app.get("/api/history")
-async def get_history(duration: int = Query(3600, ge=1, le=7200)):
-    """Get historical data points."""
+async def get_history(
+    duration: int = Query(3600, ge=1, le=7200),
+    max_points: int | None = Query(None, ge=2, le=7200),
+    response_format: Literal["json", "ndjson"] = Query("json", alias="format"),
+    sim: SimulationManager = Depends(require_sim),
+):
+    """
+    Get historical data points, optionally downsampled to max_points.
+
+    With format=ndjson each data point is written as one JSON object per line,
+    so clients can process the response line by line.
+    """
+    history = sim.get_history(duration, max_points)
+    if response_format == "ndjson":
+        return Response(
+            content=b"".join(
+                orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE)
+                for entry in history
+            ),
+            media_type="application/x-ndjson",
+        )
+    # Hand orjson the list directly; skips jsonable_encoder's walk over
+    # every history entry
+    return ORJSONResponse(history)
+
+
+async def send_error(websocket: WebSocket, message: str):
+    """Send an error message using the frame type the client asked for."""
+    frame = orjson.dumps({"type": "error", "message": message})
+    conn = simulation_manager.connections.get(websocket) if simulation_manager else None
+    if conn is not None and conn.binary:
+        await websocket.send_bytes(frame)
+    else:
+        await websocket.send_text(frame.decode())
+
+
+async def handle_command(
+    websocket: WebSocket, sim: SimulationManager, command: dict[str, Any]
+):
+    """Apply one WebSocket command, replying with an error message on failure."""
     try:
-        if simulation_manager is None or not simulation_manager.initialized:
-            return JSONResponse(
-                status_code=500, content={"error": "Simulation not initialized"}
-            )
+        msg_type = command.get("type")
+
+        if msg_type == "setpoint":
+            value = command.get("value")
+            if value is None:
+                await send_error(websocket, "Missing 'value' field")
+            else:
+                sim.set_setpoint(float(value))
+                logger.info("Setpoint command: %s", value)
+
+        elif msg_type == "pid":
+            kc = command.get("Kc")
+            tau_i = command.get("tau_I")
+            tau_d = command.get("tau_D")
+            if kc is None or tau_i is None or tau_d is None:
+                await send_error(
+                    websocket, "Missing PID gain fields (Kc, tau_I, tau_D)"
+                )
+            else:
+                gains = tank_sim.PIDGains()
+                gains.Kc = float(kc)
+                gains.tau_I = float(tau_i)
+                gains.tau_D = float(tau_d)
+                sim.set_pid_gains(gains)
+                logger.info("PID command: Kc=%s, tau_I=%s, tau_D=%s", kc, tau_i, tau_d)
+
+        elif msg_type == "inlet_flow":
+            value = command.get("value")
+            if value is None:
+                await send_error(websocket, "Missing 'value' field")
+            else:
+                sim.set_inlet_flow(float(value))
+                logger.info("Inlet flow command: %s", value)
+
+        elif msg_type == "inlet_mode":
+            mode = command.get("mode")
+            min_val = command.get("min")
+            max_val = command.get("max")
+            variance = command.get("variance", 0.05)  # Default if not provided
+            if mode is None or min_val is None or max_val is None:
+                await send_error(
+                    websocket, "Missing inlet mode fields (mode, min, max)"
+                )
+            else:
+                sim.set_inlet_mode(
+                    str(mode), float(min_val), float(max_val), float(variance)
+                )
+                logger.info("Inlet mode command: %s", mode)
+
+        else:
+            await send_error(websocket, f"Unknown message type: {msg_type}")
 
-        history = simulation_manager.get_history(duration)
-        return history
+    except (ValueError, TypeError) as e:
+        logger.error("Error parsing message values: %s", e)
+        await send_error(websocket, f"Invalid message format: {e}")
     except Exception as e:
-        logger.error(f"Error getting history: {e}")
-        return JSONResponse(status_code=500, content={"error": str(e)})
+        logger.error("Error processing message: %s", e)
+        await send_error(websocket, f"Error processing command: {e}")
 
 
 # WebSocket endpoint
@@ -270,11 +452,12 @@ async def websocket_endpoint(websocket: WebSocket):
     """
     WebSocket endpoint for real-time state broadcasting and command handling.
 
-    Sends:
+    Sends (as text frames, or binary frames when connected with ?frames=binary):
     - State updates: {"type": "state", "data": {...}}
+    - Coalesced updates: {"type": "state_batch", "points": [{...}, ...]}
     - Error messages: {"type": "error", "message": "..."}
 
-    Receives:
+    Receives (a single command object, or a JSON array of them):
     - {"type": "setpoint", "value": <float>}
     - {"type": "pid", "Kc": <float>, "tau_I": <float>, "tau_D": <float>}
     - {"type": "inlet_flow", "value": <float>}
@@ -284,116 +467,62 @@ async def websocket_endpoint(websocket: WebSocket):
     logger.info("Client connected to WebSocket")
 
     try:
-        if simulation_manager is None or not simulation_manager.initialized:
-            await websocket.send_json(
-                {"type": "error", "message": "Simulation not initialized"}
-            )
+        sim = simulation_manager
+        if sim is None or not sim.initialized:
+            await send_error(websocket, "Simulation not initialized")
             await websocket.close()
             return
 
-        simulation_manager.add_connection(websocket)
+        # Clients that parse bytes can opt in to binary frames, skipping the
+        # UTF-8 text decode on both ends
+        binary = websocket.query_params.get("frames") == "binary"
+        sim.add_connection(websocket, binary=binary)
 
         while True:
-            # Receive JSON messages from client
+            # Receive JSON messages from client. Read the raw frame so text
+            # and binary frames go straight to orjson without a str round trip.
             try:
-                data = await websocket.receive_text()
-                message = json.loads(data)
-            except json.JSONDecodeError:
-                await websocket.send_json(
-                    {"type": "error", "message": "Invalid JSON format"}
-                )
+                frame = await websocket.receive()
+                if frame["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(frame.get("code", 1000))
+                data = frame.get("text")
+                message = orjson.loads(data if data is not None else frame["bytes"])
+            except orjson.JSONDecodeError:
+                await send_error(websocket, "Invalid JSON format")
                 continue
+            except WebSocketDisconnect:
+                raise
             except Exception as e:
-                logger.error(f"Error receiving message: {e}")
+                logger.error("Error receiving message: %s", e)
                 break
 
-            # Route message based on type
-            try:
-                msg_type = message.get("type")
-
-                if msg_type == "setpoint":
-                    value = message.get("value")
-                    if value is None:
-                        await websocket.send_json(
-                            {"type": "error", "message": "Missing 'value' field"}
-                        )
-                    else:
-                        simulation_manager.set_setpoint(float(value))
-                        logger.info(f"Setpoint command: {value}")
-
-                elif msg_type == "pid":
-                    kc = message.get("Kc")
-                    tau_i = message.get("tau_I")
-                    tau_d = message.get("tau_D")
-                    if any(x is None for x in [kc, tau_i, tau_d]):
-                        await websocket.send_json(
-                            {
-                                "type": "error",
-                                "message": "Missing PID gain fields (Kc, tau_I, tau_D)",
-                            }
-                        )
-                    else:
-                        gains = tank_sim.PIDGains()
-                        gains.Kc = float(kc)
-                        gains.tau_I = float(tau_i)
-                        gains.tau_D = float(tau_d)
-                        simulation_manager.set_pid_gains(gains)
-                        logger.info(
-                            f"PID command: Kc={kc}, tau_I={tau_i}, tau_D={tau_d}"
-                        )
-
-                elif msg_type == "inlet_flow":
-                    value = message.get("value")
-                    if value is None:
-                        await websocket.send_json(
-                            {"type": "error", "message": "Missing 'value' field"}
-                        )
-                    else:
-                        simulation_manager.set_inlet_flow(float(value))
-                        logger.info(f"Inlet flow command: {value}")
-
-                elif msg_type == "inlet_mode":
-                    mode = message.get("mode")
-                    min_val = message.get("min")
-                    max_val = message.get("max")
-                    variance = message.get("variance", 0.05)  # Default if not provided
-                    if any(x is None for x in [mode, min_val, max_val]):
-                        await websocket.send_json(
-                            {
-                                "type": "error",
-                                "message": "Missing inlet mode fields (mode, min, max)",
-                            }
-                        )
-                    else:
-                        simulation_manager.set_inlet_mode(
-                            str(mode), float(min_val), float(max_val), float(variance)
-                        )
-                        logger.info(f"Inlet mode command: {mode}")
-
-                else:
-                    await websocket.send_json(
-                        {
-                            "type": "error",
-                            "message": f"Unknown message type: {msg_type}",
-                        }
-                    )
-
-            except (ValueError, TypeError) as e:
-                logger.error(f"Error parsing message values: {e}")
-                await websocket.send_json(
-                    {"type": "error", "message": f"Invalid message format: {e}"}
-                )
-            except Exception as e:
-                logger.error(f"Error processing message: {e}")
-                await websocket.send_json(
-                    {"type": "error", "message": f"Error processing command: {e}"}
-                )
+            # A frame carries either one command object or an array of them
+            commands = message if isinstance(message, list) else [message]
+            for command in commands:
+                await handle_command(websocket, sim, command)
 
     except WebSocketDisconnect:
         logger.info("Client disconnected from WebSocket")
         if simulation_manager is not None:
             simulation_manager.remove_connection(websocket)
     except Exception as e:
-        logger.error(f"WebSocket error: {e}")
+        logger.error("WebSocket error: %s", e)
         if simulation_manager is not None:
             simulation_manager.remove_connection(websocket)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # Single worker: each worker process would run its own simulation
+    uvicorn.run(
+        "api.main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        loop="uvloop",
+        http="httptools",
+        # Every client gets the same small frame; per-client deflate would
+        # recompress it once per connection for little size benefit
+        ws_per_message_deflate=False,
+        workers=1,
+    )
@@ -1,6 +1,13 @@
 from typing import cast
 
-from pydantic import BaseModel, Field, ValidationError, ValidationInfo, field_validator
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    ValidationError,
+    ValidationInfo,
+    field_validator,
+)
 
 
 class SimulationState(BaseModel):
@@ -31,6 +38,8 @@ class SetpointCommand(BaseModel):
     Model for setpoint change commands.
     """
 
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
     value: float = Field(..., ge=0.0, le=5.0, description="New setpoint in meters")
 
 
@@ -39,6 +48,8 @@ class PIDTuningCommand(BaseModel):
     Model for PID tuning commands.
     """
 
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
     Kc: float = Field(
         ...,
         description="Proportional gain (can be negative for reverse-acting control)",
@@ -60,6 +71,8 @@ class InletFlowCommand(BaseModel):
     Model for inlet flow commands.
     """
 
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
     value: float = Field(
         ..., ge=0.0, le=2.0, description="New inlet flow in cubic meters per second"
     )
@@ -70,6 +83,8 @@ class InletModeCommand(BaseModel):
     Model for inlet mode commands.
     """
 
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
     mode: str = Field(..., description="Inlet mode (either 'constant' or 'brownian')")
     min: float = Field(
         0.8, ge=0.0, le=2.0, description="Minimum flow for Brownian mode, default 0.8"
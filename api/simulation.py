@@ -1,21 +1,75 @@
 import asyncio
 import logging
-from collections import deque
-from typing import Any
+import math
+import threading
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import Any, final
 
 import numpy as np
+import orjson
 
 import tank_sim
 
 logger = logging.getLogger(__name__)
 
+# Maximum frames buffered per WebSocket client before the oldest is dropped
+CONNECTION_QUEUE_SIZE = 32
 
+# Seconds a single frame may take to send before the client is dropped
+SEND_TIMEOUT = 0.5
+
+# History ring buffer: 2 hours at 1 Hz, one column per state snapshot field
+HISTORY_CAPACITY = 7200
+HISTORY_FIELDS = (
+    "time",
+    "tank_level",
+    "setpoint",
+    "inlet_flow",
+    "outlet_flow",
+    "valve_position",
+    "error",
+    "controller_output",
+)
+_history_row = itemgetter(*HISTORY_FIELDS)
+
+_sqrt = math.sqrt
+
+
+@dataclass(slots=True)
+class _ConnState:
+    """Per-connection outbound state: pending frames and the task sending them."""
+
+    queue: asyncio.Queue
+    writer_task: asyncio.Task
+    # Client asked for binary frames (/ws?frames=binary) instead of text
+    binary: bool = False
+
+
+@final
 class SimulationManager:
     """
     Singleton manager for the tank simulator.
     Manages simulation state and provides interface for API to interact with the simulator.
     """
 
+    __slots__ = (
+        "_initialized_once",
+        "config",
+        "_k_v",
+        "_config_bytes",
+        "initialized",
+        "simulator",
+        "connections",
+        "_hist",
+        "_hist_idx",
+        "_hist_len",
+        "inlet_mode",
+        "inlet_mode_params",
+        "_lock",
+        "_stop_event",
+    )
+
     _instance: "SimulationManager | None" = None
 
     def __new__(cls, config: tank_sim.SimulatorConfig):
@@ -24,28 +78,96 @@ class SimulationManager:
         return cls._instance
 
     def __init__(self, config: tank_sim.SimulatorConfig):
+        # __new__ hands back the existing instance; don't wipe its simulator,
+        # connections and history. Use reconfigure() to change the config.
+        if getattr(self, "_initialized_once", False):
+            return
+        self._initialized_once = True
+
         self.config: tank_sim.SimulatorConfig = config
+        # Cached so get_state doesn't walk config.model_params on every call
+        self._k_v: float = config.model_params.k_v
         self.initialized: bool = False
         self.simulator: tank_sim.Simulator | None = None
-        self.connections: set = set()
-        self.history: deque = deque(maxlen=7200)  # 2 hours at 1 Hz
+        self.connections: dict[Any, _ConnState] = {}
+        # Preallocated ring buffer; _hist_idx is the next row to write
+        self._hist = np.empty((HISTORY_CAPACITY, len(HISTORY_FIELDS)), dtype=np.float64)
+        self._hist_idx: int = 0
+        self._hist_len: int = 0
         self.inlet_mode: str = "constant"
         self.inlet_mode_params: dict[str, float] = {
             "min": 0.8,
             "max": 1.2,
             "variance": 0.05,
         }
+        # The simulator is stepped on a dedicated thread (see simulation_loop)
+        # while API handlers read and modify it from the event loop
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
 
     def initialize(self):
         """Initialize the simulator with the configuration."""
         try:
             self.simulator = tank_sim.Simulator(self.config)
+            self._config_bytes = self._serialize_config()
             self.initialized = True
             logger.info("SimulationManager initialized successfully")
         except Exception as e:
-            logger.error(f"Failed to initialize simulator: {e}")
+            logger.error("Failed to initialize simulator: %s", e)
             raise
 
+    def reconfigure(self, config: tank_sim.SimulatorConfig):
+        """
+        Replace the configuration and rebuild the simulator from it.
+
+        WebSocket connections are kept; the history buffer is cleared since
+        it no longer describes the running simulation.
+        """
+        with self._lock:
+            self.config = config
+            self._k_v = config.model_params.k_v
+            self.initialize()
+        self._hist_idx = 0
+        self._hist_len = 0
+        logger.info("SimulationManager reconfigured")
+
+    def _serialize_config(self) -> bytes:
+        """
+        Serialize the immutable part of the ConfigResponse payload.
+
+        The configuration only changes through reconfigure(), so it is encoded
+        once per configuration rather than per request. The returned bytes
+        stop right before the value of the trailing "history_size" field,
+        which config_bytes fills in per request.
+        """
+        config = self.config
+        model_params = config.model_params
+        controller = config.controllers[0]
+        gains = controller.gains
+
+        static = orjson.dumps(
+            {
+                "tank_height": float(model_params.max_height),
+                "tank_area": float(model_params.area),
+                "valve_coefficient": float(model_params.k_v),
+                "initial_level": float(config.initial_state[0]),
+                "initial_setpoint": float(controller.initial_setpoint),
+                "pid_gains": {
+                    "Kc": float(gains.Kc),
+                    "tau_I": float(gains.tau_I),
+                    "tau_D": float(gains.tau_D),
+                },
+                "timestep": float(config.dt),
+                "history_capacity": HISTORY_CAPACITY,
+            }
+        )
+        return static[:-1] + b',"history_size":'
+
+    @property
+    def config_bytes(self) -> bytes:
+        """Serialized ConfigResponse JSON, ready to send as a response body."""
+        return self._config_bytes + b"%d}" % self._hist_len
+
     def get_state(self) -> dict[str, Any]:
         """Get current simulation state snapshot."""
         if self.simulator is None or not self.initialized:
@@ -62,33 +184,40 @@ class SimulationManager:
             }
 
         try:
-            state = self.simulator.get_state()
-            tank_level = state[0]
-            setpoint = self.simulator.get_setpoint(0)  # 0 is controller index
-            inlet_flow = self.simulator.get_inputs()[0]
-            valve_position = self.simulator.get_inputs()[1]
-            error = self.simulator.get_error(0)  # 0 is controller index
-            controller_output = self.simulator.get_controller_output(0)
-            time = self.simulator.get_time()
-
-            # Calculate outlet flow using valve equation: q_out = k_v * valve_position * sqrt(tank_level)
-            k_v = self.config.model_params.k_v
-            outlet_flow = (
-                k_v * valve_position * (tank_level**0.5) if tank_level > 0 else 0.0
-            )
+            simulator = self.simulator
+            with self._lock:
+                # Fetch each vector once; every call crosses the pybind11 boundary
+                state = simulator.get_state()
+                inputs = simulator.get_inputs()
+                # Scalar getters already return Python floats; only elements of
+                # the NumPy state/input vectors need converting for orjson.
+                # The vectors are live views, so read them before releasing
+                # the lock.
+                tank_level = float(state[0])
+                valve_position = float(inputs[1])
+                inlet_flow = float(inputs[0])
+                setpoint = simulator.get_setpoint(0)  # 0 is controller index
+                error = simulator.get_error(0)  # 0 is controller index
+                controller_output = simulator.get_controller_output(0)
+                time = simulator.get_time()
 
             return {
-                "time": float(time),
-                "tank_level": float(tank_level),
-                "setpoint": float(setpoint),
-                "inlet_flow": float(inlet_flow),
-                "outlet_flow": float(outlet_flow),
-                "valve_position": float(valve_position),
-                "error": float(error),
-                "controller_output": float(controller_output),
+                "time": time,
+                "tank_level": tank_level,
+                "setpoint": setpoint,
+                "inlet_flow": inlet_flow,
+                # Valve equation: q_out = k_v * valve_position * sqrt(tank_level)
+                "outlet_flow": (
+                    self._k_v * valve_position * _sqrt(tank_level)
+                    if tank_level > 0
+                    else 0.0
+                ),
+                "valve_position": valve_position,
+                "error": error,
+                "controller_output": controller_output,
             }
         except Exception as e:
-            logger.error(f"Error getting state: {e}")
+            logger.error("Error getting state: %s", e)
             return {
                 "time": 0.0,
                 "tank_level": 0.0,
@@ -107,15 +236,16 @@ class SimulationManager:
             return
 
         try:
-            # Apply Brownian inlet flow if enabled
-            if self.inlet_mode == "brownian":
-                current_inlet_flow = self.simulator.get_inputs()[0]
-                new_inlet_flow = self.apply_brownian_inlet(current_inlet_flow)
-                self.simulator.set_input(0, new_inlet_flow)
-
-            self.simulator.step()
+            with self._lock:
+                # Apply Brownian inlet flow if enabled
+                if self.inlet_mode == "brownian":
+                    current_inlet_flow = self.simulator.get_inputs()[0]
+                    new_inlet_flow = self.apply_brownian_inlet(current_inlet_flow)
+                    self.simulator.set_input(0, new_inlet_flow)
+
+                self.simulator.step()
         except Exception as e:
-            logger.error(f"Error during simulation step: {e}")
+            logger.error("Error during simulation step: %s", e)
 
     def reset(self):
         """Reset simulation to initial conditions and clear history buffer."""
@@ -124,17 +254,19 @@ class SimulationManager:
             return
 
         try:
-            self.simulator.reset()
-            self.history.clear()
-            self.inlet_mode = "constant"
-            self.inlet_mode_params = {
-                "min": 0.8,
-                "max": 1.2,
-                "variance": 0.05,
-            }
+            with self._lock:
+                self.simulator.reset()
+                self.inlet_mode = "constant"
+                self.inlet_mode_params = {
+                    "min": 0.8,
+                    "max": 1.2,
+                    "variance": 0.05,
+                }
+            self._hist_idx = 0
+            self._hist_len = 0
             logger.info("Simulation reset to initial conditions and history cleared")
         except Exception as e:
-            logger.error(f"Error resetting simulation: {e}")
+            logger.error("Error resetting simulation: %s", e)
 
     def set_setpoint(self, value: float):
         """Set the controller setpoint."""
@@ -143,10 +275,11 @@ class SimulationManager:
             return
 
         try:
-            self.simulator.set_setpoint(0, value)  # 0 is controller index
-            logger.info(f"Setpoint set to {value}")
+            with self._lock:
+                self.simulator.set_setpoint(0, value)  # 0 is controller index
+            logger.info("Setpoint set to %s", value)
         except Exception as e:
-            logger.error(f"Error setting setpoint: {e}")
+            logger.error("Error setting setpoint: %s", e)
 
     def set_pid_gains(self, gains: tank_sim.PIDGains):
         """Set PID controller gains."""
@@ -155,12 +288,16 @@ class SimulationManager:
             return
 
         try:
-            self.simulator.set_controller_gains(0, gains)  # 0 is controller index
+            with self._lock:
+                self.simulator.set_controller_gains(0, gains)  # 0 is controller index
             logger.info(
-                f"PID gains set: Kc={gains.Kc}, tau_I={gains.tau_I}, tau_D={gains.tau_D}"
+                "PID gains set: Kc=%s, tau_I=%s, tau_D=%s",
+                gains.Kc,
+                gains.tau_I,
+                gains.tau_D,
             )
         except Exception as e:
-            logger.error(f"Error setting PID gains: {e}")
+            logger.error("Error setting PID gains: %s", e)
 
     def set_inlet_flow(self, value: float):
         """Set inlet flow rate."""
@@ -169,10 +306,11 @@ class SimulationManager:
             return
 
         try:
-            self.simulator.set_input(0, value)  # 0 is inlet flow input index
-            logger.info(f"Inlet flow set to {value}")
+            with self._lock:
+                self.simulator.set_input(0, value)  # 0 is inlet flow input index
+            logger.info("Inlet flow set to %s", value)
         except Exception as e:
-            logger.error(f"Error setting inlet flow: {e}")
+            logger.error("Error setting inlet flow: %s", e)
 
     def apply_brownian_inlet(self, current_flow: float) -> float:
         """
@@ -206,106 +344,225 @@ class SimulationManager:
             return
 
         try:
-            # Store mode parameters for Brownian implementation
-            self.inlet_mode = mode
-            self.inlet_mode_params = {
-                "min": min_flow,
-                "max": max_flow,
-                "variance": variance,
-            }
+            # Store mode parameters for Brownian implementation. Swap both
+            # under the lock so step() never sees the new mode with old params.
+            with self._lock:
+                self.inlet_mode = mode
+                self.inlet_mode_params = {
+                    "min": min_flow,
+                    "max": max_flow,
+                    "variance": variance,
+                }
             if mode == "brownian":
                 logger.info(
-                    f"Brownian inlet mode enabled: min={min_flow}, max={max_flow}, variance={variance}"
+                    "Brownian inlet mode enabled: min=%s, max=%s, variance=%s",
+                    min_flow,
+                    max_flow,
+                    variance,
                 )
             else:
-                logger.info(f"Inlet mode set to {mode}")
+                logger.info("Inlet mode set to %s", mode)
         except Exception as e:
-            logger.error(f"Error setting inlet mode: {e}")
+            logger.error("Error setting inlet mode: %s", e)
 
-    def get_history(self, duration: int = 3600) -> list[dict[str, Any]]:
+    def get_history(
+        self, duration: int = 3600, max_points: int | None = None
+    ) -> list[dict[str, Any]]:
         """
         Get historical data points.
 
         Args:
             duration: Number of seconds of history to return (1-7200, default 3600)
+            max_points: If set, evenly downsample the window to at most this
+                many points, always keeping the oldest and newest entries
 
         Returns:
             List of state snapshots in chronological order (oldest first)
         """
         if duration < 1 or duration > 7200:
-            logger.warning(f"Invalid duration {duration}, clamping to valid range")
+            logger.warning("Invalid duration %s, clamping to valid range", duration)
             duration = max(1, min(duration, 7200))
 
-        num_entries = min(duration, len(self.history))
+        num_entries = min(duration, self._hist_len)
         if num_entries == 0:
             return []
 
-        return list(self.history)[-num_entries:]
+        start = (self._hist_idx - num_entries) % HISTORY_CAPACITY
+        end = start + num_entries
+        if max_points is not None and num_entries > max_points:
+            # Gather evenly spaced rows straight out of the ring in one pass
+            picks = np.linspace(0, num_entries - 1, max_points, dtype=np.intp)
+            rows = self._hist[(start + picks) % HISTORY_CAPACITY]
+        elif end <= HISTORY_CAPACITY:
+            # The requested window is at most two contiguous segments
+            # of the buffer
+            rows = self._hist[start:end]
+        else:
+            rows = np.concatenate(
+                (self._hist[start:], self._hist[: end - HISTORY_CAPACITY])
+            )
 
-    def add_connection(self, websocket):
-        """Add a WebSocket connection."""
-        self.connections.add(websocket)
+        return [dict(zip(HISTORY_FIELDS, row)) for row in rows.tolist()]
+
+    def _append_history(self, state: dict[str, Any]):
+        """Write a state snapshot into the next row of the history buffer."""
+        self._hist[self._hist_idx] = _history_row(state)
+        self._hist_idx = (self._hist_idx + 1) % HISTORY_CAPACITY
+        if self._hist_len < HISTORY_CAPACITY:
+            self._hist_len += 1
+
+    def add_connection(self, websocket, binary: bool = False):
+        """
+        Add a WebSocket connection.
+
+        Each connection gets a bounded outbound queue drained by a single
+        long-lived writer task, so broadcasting never waits on a slow client.
+        With binary=True the client is sent binary frames of UTF-8 JSON.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=CONNECTION_QUEUE_SIZE)
+        writer_task = asyncio.create_task(self._writer(websocket, queue, binary))
+        self.connections[websocket] = _ConnState(queue, writer_task, binary)
         logger.info(
-            f"WebSocket connection added. Total connections: {len(self.connections)}"
+            "WebSocket connection added. Total connections: %s", len(self.connections)
         )
 
     def remove_connection(self, websocket):
-        """Remove a WebSocket connection."""
-        self.connections.discard(websocket)
+        """Remove a WebSocket connection and stop its writer task."""
+        conn = self.connections.pop(websocket, None)
+        if conn is not None:
+            conn.writer_task.cancel()
         logger.info(
-            f"WebSocket connection removed. Total connections: {len(self.connections)}"
+            "WebSocket connection removed. Total connections: %s",
+            len(self.connections),
         )
 
+    async def _writer(self, websocket, queue: asyncio.Queue, binary: bool):
+        """Send queued frames to one client until it fails or is removed."""
+        send = websocket.send_bytes if binary else websocket.send_text
+        try:
+            while True:
+                frame = await queue.get()
+                # A wedged client would otherwise hold its writer (and the
+                # transport's buffers) forever
+                await asyncio.wait_for(send(frame), SEND_TIMEOUT)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            logger.warning("Client did not accept a frame within %ss", SEND_TIMEOUT)
+            # Close the socket as well, so the client sees a disconnect and can
+            # reconnect rather than staying connected without broadcasts.
+            # 1013 is "Try Again Later".
+            try:
+                await asyncio.wait_for(websocket.close(code=1013), SEND_TIMEOUT)
+            except Exception as e:
+                logger.warning("Error closing stalled client: %s", e)
+            self.remove_connection(websocket)
+        except Exception as e:
+            logger.warning("Error sending message to client: %s", e)
+            self.remove_connection(websocket)
+
     async def broadcast(self, message: dict[str, Any]):
         """Broadcast message to all connected clients."""
-        disconnected = []
-        for connection in self.connections:
+        # Serialize once and reuse the same frame for every client. Text frames
+        # are the default because browser clients JSON.parse() the frame data;
+        # the decoded copy is only made if some client needs it.
+        payload = orjson.dumps(message)
+        text = None
+
+        for conn in self.connections.values():
+            if conn.binary:
+                frame = payload
+            else:
+                if text is None:
+                    text = payload.decode()
+                frame = text
+            queue = conn.queue
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # Slow client: shed load by dropping its oldest pending frame
+                queue.get_nowait()
+                queue.put_nowait(frame)
+
+    def _run_simulation(
+        self, loop: asyncio.AbstractEventLoop, snapshots: asyncio.Queue
+    ):
+        """
+        Step the simulator in real time on the dedicated simulation thread.
+
+        Each tick advances the simulation by one time step and hands the
+        resulting state snapshot to the event loop, so a slow step never
+        blocks WebSocket writers or HTTP handlers.
+        """
+        # Re-read dt every tick so reconfigure() with a new time step also
+        # changes the real-time rate
+        while not self._stop_event.wait(self.config.dt):
             try:
-                await connection.send_json(message)
+                # Advance simulation by one step and take a snapshot
+                self.step()
+                state = self.get_state()
             except Exception as e:
-                logger.warning(f"Error sending message to client: {e}")
-                disconnected.append(connection)
+                # One bad tick must not end the thread and stop broadcasts
+                logger.error("Error in simulation step: %s", e)
+                continue
 
-        # Remove failed connections
-        for connection in disconnected:
-            self.remove_connection(connection)
+            try:
+                loop.call_soon_threadsafe(snapshots.put_nowait, state)
+            except RuntimeError:
+                # Event loop already closed during shutdown
+                break
 
     async def simulation_loop(self):
         """
-        Main simulation loop running at 1 Hz.
+        Main simulation loop, ticking once per simulation time step (1 Hz).
 
-        Continuously:
-        - Steps the simulation
-        - Gets current state
-        - Broadcasts state to all connected WebSocket clients
+        Starts the simulation thread, then continuously:
+        - Receives state snapshots produced by the simulation thread
         - Stores state in history buffer
+        - Broadcasts state to all connected WebSocket clients, batching
+          snapshots that queued up while the loop was busy
         """
         logger.info("Simulation loop started")
+        snapshots: asyncio.Queue = asyncio.Queue()
+        self._stop_event.clear()
+        sim_thread = threading.Thread(
+            target=self._run_simulation,
+            args=(asyncio.get_running_loop(), snapshots),
+            name="simulation",
+            daemon=True,
+        )
+        sim_thread.start()
+
         try:
             while True:
-                await asyncio.sleep(1.0)
+                points = [await snapshots.get()]
+                # If the loop fell behind, coalesce every tick already waiting
+                # into one frame rather than sending them back to back
+                while not snapshots.empty():
+                    points.append(snapshots.get_nowait())
 
                 try:
-                    # Advance simulation by one step
-                    self.step()
-
-                    # Get current state
-                    state = self.get_state()
-
                     # Store in history buffer
-                    self.history.append(state)
+                    for state in points:
+                        self._append_history(state)
 
                     # Broadcast to all connected clients
-                    message = {"type": "state", "data": state}
+                    if len(points) == 1:
+                        message = {"type": "state", "data": points[0]}
+                    else:
+                        message = {"type": "state_batch", "points": points}
                     await self.broadcast(message)
 
                 except Exception as e:
-                    logger.error(f"Error in simulation loop iteration: {e}")
+                    logger.error("Error in simulation loop iteration: %s", e)
                     # Continue loop without crashing
 
         except asyncio.CancelledError:
             logger.info("Simulation loop cancelled")
             raise
         except Exception as e:
-            logger.error(f"Fatal error in simulation loop: {e}")
+            logger.error("Fatal error in simulation loop: %s", e)
             raise
+        finally:
+            self._stop_event.set()
+            sim_thread.join()
@@ -9,6 +9,7 @@ import sys
 from unittest.mock import MagicMock
 
 import httpx
+import orjson
 import pytest
 from starlette.testclient import TestClient
 
@@ -131,12 +132,12 @@ def mock_tank_sim():
     yield sys.modules.get("tank_sim")
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def app():
     """
     Fixture that returns the FastAPI application instance.
 
-    This creates a fresh app for each test to ensure isolation.
+    The singleton is reset once, before the session client runs the lifespan.
     """
     # Import after mock_tank_sim fixture ensures mock is in place
     from api.main import app as fastapi_app
@@ -148,20 +149,31 @@ def app():
     return fastapi_app
 
 
-@pytest.fixture
-def client(app):
+@pytest.fixture(scope="session")
+def session_client(app):
     """
-    Fixture that returns a synchronous test client for testing.
+    Fixture that returns a synchronous test client shared by the whole session.
 
-    This uses Starlette's TestClient which works synchronously with FastAPI.
-    For async tests, use this client with asyncio patterns.
-
-    The TestClient automatically handles the lifespan context manager.
+    The TestClient runs the lifespan context manager on entry, so the
+    simulation manager and its loop are started once rather than per test.
+    Tests should use ``client``, which also resets the simulation.
     """
     with TestClient(app) as test_client:
         yield test_client
 
 
+@pytest.fixture
+def client(session_client):
+    """
+    Fixture that returns the session test client with a freshly reset simulation.
+
+    POST /api/reset restores the initial state, inlet mode and history, which
+    isolates tests without paying for a lifespan startup each time.
+    """
+    session_client.post("/api/reset")
+    yield session_client
+
+
 @pytest.fixture
 async def async_client(app):
     """
@@ -213,3 +225,17 @@ def default_config():
         "timestep": 1.0,
         "history_capacity": 7200,
     }
+
+
+def recv(ws):
+    """Receive one binary WebSocket frame and decode it with orjson.
+
+    The connection must be opened with ``?frames=binary``.
+    """
+    return orjson.loads(ws.receive_bytes())
+
+
+def send_and_recv(ws, command):
+    """Send a command as a binary JSON frame and return the next decoded frame."""
+    ws.send_bytes(orjson.dumps(command))
+    return recv(ws)
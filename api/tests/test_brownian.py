@@ -34,6 +34,7 @@ def mock_config():
 @pytest.fixture
 def sim_manager(mock_config):
     """Create a SimulationManager instance with mocked simulator."""
+    SimulationManager._instance = None
     with patch("tank_sim.Simulator"):
         manager = SimulationManager(mock_config)
         manager.initialized = True
@@ -43,15 +44,15 @@ def sim_manager(mock_config):
         manager.simulator.get_state.return_value = [2.0]
         manager.simulator.get_setpoint.return_value = 3.0
 
-        # Track inlet flow for testing
-        manager.current_inlet_flow = 1.0
+        # Track inlet flow for testing (on the mock; the manager uses __slots__)
+        manager.simulator.current_inlet_flow = 1.0
 
         def mock_get_inputs():
-            return [manager.current_inlet_flow, 0.5]
+            return [manager.simulator.current_inlet_flow, 0.5]
 
         def mock_set_input(index, value):
             if index == 0:
-                manager.current_inlet_flow = value
+                manager.simulator.current_inlet_flow = value
 
         manager.simulator.get_inputs = mock_get_inputs
         manager.simulator.set_input = mock_set_input
@@ -76,7 +77,7 @@ async def test_brownian_mode_changes_inlet_flow(sim_manager):
     # Collect inlet flow values over 10 steps
     inlet_flows = []
     for _ in range(10):
-        inlet_flows.append(sim_manager.current_inlet_flow)
+        inlet_flows.append(sim_manager.simulator.current_inlet_flow)
         sim_manager.step()
 
     # Verify that flows changed (not constant)
@@ -99,7 +100,7 @@ async def test_brownian_mode_respects_bounds(sim_manager):
     # Collect inlet flow values over 50 steps
     inlet_flows = []
     for _ in range(50):
-        inlet_flows.append(sim_manager.current_inlet_flow)
+        inlet_flows.append(sim_manager.simulator.current_inlet_flow)
         sim_manager.step()
 
     # Verify ALL flows stay within bounds despite high variance
@@ -118,7 +119,7 @@ async def test_brownian_mode_mean_reversion(sim_manager):
     # Collect inlet flow values over 1000 steps
     inlet_flows = []
     for _ in range(1000):
-        inlet_flows.append(sim_manager.current_inlet_flow)
+        inlet_flows.append(sim_manager.simulator.current_inlet_flow)
         sim_manager.step()
 
     # Compute mean of collected values
@@ -139,18 +140,18 @@ async def test_brownian_variance_effect(sim_manager):
 
     low_var_flows = []
     for _ in range(100):
-        low_var_flows.append(sim_manager.current_inlet_flow)
+        low_var_flows.append(sim_manager.simulator.current_inlet_flow)
         sim_manager.step()
 
     low_var_std = np.std(low_var_flows)
 
     # Reset for second run
-    sim_manager.current_inlet_flow = 1.0
+    sim_manager.simulator.current_inlet_flow = 1.0
     sim_manager.set_inlet_mode("brownian", min_flow=0.5, max_flow=1.5, variance=0.2)
 
     high_var_flows = []
     for _ in range(100):
-        high_var_flows.append(sim_manager.current_inlet_flow)
+        high_var_flows.append(sim_manager.simulator.current_inlet_flow)
         sim_manager.step()
 
     high_var_std = np.std(high_var_flows)
@@ -175,7 +176,7 @@ async def test_constant_mode_disables_brownian(sim_manager):
         sim_manager.step()
 
     # Get current inlet flow
-    frozen_flow = sim_manager.current_inlet_flow
+    frozen_flow = sim_manager.simulator.current_inlet_flow
 
     # Switch to constant mode
     sim_manager.set_inlet_mode("constant", min_flow=0.5, max_flow=1.5, variance=0.0)
@@ -183,7 +184,7 @@ async def test_constant_mode_disables_brownian(sim_manager):
     # Verify inlet flow stops changing
     for _ in range(10):
         sim_manager.step()
-        current_flow = sim_manager.current_inlet_flow
+        current_flow = sim_manager.simulator.current_inlet_flow
         # In constant mode, inlet flow should not change
         assert current_flow == frozen_flow, (
             f"Inlet flow changed in constant mode: {frozen_flow} -> {current_flow}"
@@ -219,7 +220,7 @@ async def test_pid_rejects_brownian_disturbances(sim_manager):
     inlet_flows = []
 
     for i in range(100):
-        inlet_flows.append(sim_manager.current_inlet_flow)
+        inlet_flows.append(sim_manager.simulator.current_inlet_flow)
         sim_manager.step()
 
     # Verify inlet flows vary due to Brownian motion
@@ -6,7 +6,9 @@ REST requests, WebSocket connections, and mixed operations.
 """
 
 import asyncio
+from unittest.mock import MagicMock, patch
 
+import orjson
 import pytest
 from starlette.testclient import TestClient
 
@@ -120,3 +122,208 @@ def test_concurrent_inlet_mode_changes(client):
     # All should succeed
     for response in responses:
         assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_broadcast_drops_oldest_frames_for_slow_client(mock_tank_sim):
+    """A client that stops reading keeps only the newest frames queued."""
+    from api.simulation import CONNECTION_QUEUE_SIZE, SimulationManager
+
+    SimulationManager._instance = None
+    manager = SimulationManager(mock_tank_sim.create_default_config())
+
+    class StalledWebSocket:
+        async def send_text(self, frame):
+            await asyncio.Event().wait()  # never completes
+
+    ws = StalledWebSocket()
+    manager.add_connection(ws)
+    await asyncio.sleep(0)  # let the writer pick up its first frame
+
+    for i in range(CONNECTION_QUEUE_SIZE + 10):
+        await manager.broadcast({"type": "state", "seq": i})
+
+    queue = manager.connections[ws].queue
+    assert queue.qsize() == CONNECTION_QUEUE_SIZE
+    assert '"seq":10' in queue.get_nowait()
+
+    manager.remove_connection(ws)
+    assert ws not in manager.connections
+
+
+@pytest.mark.asyncio
+async def test_writer_drops_client_that_stops_accepting_frames(
+    mock_tank_sim, monkeypatch
+):
+    """A send that never completes times out, closes the socket and removes it."""
+    import api.simulation
+    from api.simulation import SimulationManager
+
+    monkeypatch.setattr(api.simulation, "SEND_TIMEOUT", 0.01)
+    SimulationManager._instance = None
+    manager = SimulationManager(mock_tank_sim.create_default_config())
+
+    class StalledWebSocket:
+        close_code = None
+
+        async def send_text(self, frame):
+            await asyncio.Event().wait()  # never completes
+
+        async def close(self, code=1000):
+            self.close_code = code
+
+    ws = StalledWebSocket()
+    manager.add_connection(ws)
+    await manager.broadcast({"type": "state", "seq": 0})
+    await asyncio.sleep(0.1)
+
+    assert ws not in manager.connections
+    assert ws.close_code == 1013
+
+
+def test_history_buffer_wraps_around(mock_tank_sim):
+    """Once full, the history buffer overwrites its oldest rows in order."""
+    from api.simulation import HISTORY_CAPACITY, HISTORY_FIELDS, SimulationManager
+
+    SimulationManager._instance = None
+    manager = SimulationManager(mock_tank_sim.create_default_config())
+
+    for i in range(HISTORY_CAPACITY + 5):
+        manager._append_history({field: float(i) for field in HISTORY_FIELDS})
+
+    history = manager.get_history(HISTORY_CAPACITY)
+    assert len(history) == HISTORY_CAPACITY
+    assert history[0]["time"] == 5.0
+    assert history[-1]["time"] == HISTORY_CAPACITY + 4.0
+    assert [entry["time"] for entry in manager.get_history(10)] == [
+        float(i) for i in range(HISTORY_CAPACITY - 5, HISTORY_CAPACITY + 5)
+    ]
+
+
+def test_repeated_construction_keeps_manager_state(mock_tank_sim):
+    """Calling SimulationManager(config) again must not reset the live instance."""
+    from api.simulation import SimulationManager, _ConnState
+
+    SimulationManager._instance = None
+    manager = SimulationManager(mock_tank_sim.create_default_config())
+    manager.initialize()
+    simulator = manager.simulator
+    manager.connections[object()] = _ConnState(
+        asyncio.Queue(), MagicMock(spec=asyncio.Task)
+    )
+
+    again = SimulationManager(mock_tank_sim.create_default_config())
+    assert again is manager
+    assert again.initialized
+    assert again.simulator is simulator
+    assert len(again.connections) == 1
+
+    again.reconfigure(mock_tank_sim.create_default_config())
+    assert again.initialized
+    assert again.simulator is not simulator
+    assert len(again.connections) == 1
+
+
+def _config_with_dt(mock_tank_sim, dt):
+    """Return a mock config copying the default config, with its own dt."""
+    base = mock_tank_sim.create_default_config()
+    config = MagicMock()
+    config.model_params = base.model_params
+    config.controllers = base.controllers
+    config.initial_state = base.initial_state
+    config.dt = dt
+    return config
+
+
+def test_reconfigure_changes_tick_period(mock_tank_sim):
+    """The simulation thread must pick up a new dt after reconfigure().
+
+    The configs are plain mocks, so tank_sim.Simulator is patched as in
+    test_brownian.py; this keeps the test independent of whether the real
+    extension or the conftest mock is loaded.
+    """
+    import threading
+    import time
+    from api.simulation import SimulationManager
+
+    ticks = []
+    done = threading.Event()
+
+    class FakeLoop:
+        def call_soon_threadsafe(self, callback, state):
+            ticks.append(time.monotonic())
+            if len(ticks) == 2:
+                manager.reconfigure(_config_with_dt(mock_tank_sim, 0.2))
+            elif len(ticks) == 3:
+                manager._stop_event.set()
+                done.set()
+
+    SimulationManager._instance = None
+    with patch("tank_sim.Simulator"):
+        manager = SimulationManager(_config_with_dt(mock_tank_sim, 0.01))
+        manager.initialize()
+
+        manager._stop_event.clear()
+        thread = threading.Thread(
+            target=manager._run_simulation,
+            args=(FakeLoop(), asyncio.Queue()),
+            daemon=True,
+        )
+        thread.start()
+        assert done.wait(5.0), "Simulation thread stopped ticking"
+        thread.join(1.0)
+
+    assert ticks[2] - ticks[1] >= 0.15, "Tick period should follow the new dt"
+
+
+@pytest.mark.asyncio
+async def test_simulation_loop_batches_queued_ticks(mock_tank_sim):
+    """Ticks that queue up while the event loop is busy go out as one state_batch."""
+    import time
+
+    from api.simulation import SimulationManager
+
+    SimulationManager._instance = None
+    with patch("tank_sim.Simulator") as simulator_cls:
+        simulator = simulator_cls.return_value
+        simulator.get_state.return_value = [2.5]
+        simulator.get_inputs.return_value = [1.0, 0.5]
+        simulator.get_setpoint.return_value = 2.5
+        simulator.get_error.return_value = 0.0
+        simulator.get_controller_output.return_value = 0.5
+        simulator.get_time.return_value = 0.0
+
+        manager = SimulationManager(_config_with_dt(mock_tank_sim, 0.01))
+        manager.initialize()
+
+        class RecordingWebSocket:
+            def __init__(self):
+                self.frames = []
+
+            async def send_text(self, frame):
+                self.frames.append(orjson.loads(frame))
+
+        ws = RecordingWebSocket()
+        manager.add_connection(ws)
+
+        task = asyncio.create_task(manager.simulation_loop())
+        await asyncio.sleep(0)  # start the simulation thread
+        time.sleep(0.1)  # block the event loop while ticks queue up
+        await asyncio.sleep(0.05)
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        manager.remove_connection(ws)
+
+    batches = [frame for frame in ws.frames if frame["type"] == "state_batch"]
+    assert batches, "Queued ticks should be coalesced into a state_batch frame"
+    assert len(batches[0]["points"]) > 1
+    assert batches[0]["points"][-1]["tank_level"] == 2.5
+
+    # Every point sent was also stored (later ticks may not have been sent yet)
+    sent = sum(
+        len(frame["points"]) if frame["type"] == "state_batch" else 1
+        for frame in ws.frames
+    )
+    assert manager._hist_len >= sent
@@ -5,6 +5,8 @@ Tests all HTTP endpoints including GET, POST, and error cases.
 Uses mocked tank_sim to avoid C++ compilation dependency.
 """
 
+import json
+
 import pytest
 
 
@@ -93,6 +95,59 @@ def test_get_history_validation(client):
     assert response.status_code == 422
 
 
+def test_get_history_max_points(client):
+    """Verify GET /api/history?max_points=N downsamples to exactly N entries."""
+    import api.main
+
+    sim = api.main.simulation_manager
+    assert sim is not None
+    state = sim.get_state()
+    for i in range(500):
+        sim._append_history({**state, "time": 1000.0 + i})
+
+    # The session's simulation thread can append a tick at any moment; retry
+    # until none lands between the two full reads around the request
+    while True:
+        before = sim.get_history(7200)
+        response = client.get("/api/history?duration=7200&max_points=100")
+        if len(sim.get_history(7200)) == len(before):
+            break
+    assert response.status_code == 200
+    data = response.json()
+
+    assert isinstance(data, list)
+    assert len(data) == 100
+    assert data[0] == before[0]
+    assert data[-1] == before[-1]
+
+    # max_points must be at least 2
+    response = client.get("/api/history?max_points=1")
+    assert response.status_code == 422
+
+
+def test_get_history_ndjson(client):
+    """Verify GET /api/history?format=ndjson returns one JSON object per line."""
+    import api.main
+
+    sim = api.main.simulation_manager
+    for _ in range(3):
+        sim._append_history(sim.get_state())
+
+    response = client.get("/api/history?format=ndjson")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    lines = response.text.splitlines()
+    assert len(lines) >= 3
+    for line in lines:
+        entry = json.loads(line)
+        assert "time" in entry
+        assert "tank_level" in entry
+
+    response = client.get("/api/history?format=csv")
+    assert response.status_code == 422
+
+
 def test_post_setpoint_valid(client):
     """Verify POST /api/setpoint with valid value succeeds."""
     payload = {"value": 3.5}
@@ -182,6 +237,65 @@ def test_json_parse_error(client):
     assert response.status_code in [400, 422]
 
 
+def test_setpoint_empty_body_matches_declared_body_error(client):
+    """Verify an empty /api/setpoint body gets FastAPI's missing-body error."""
+    headers = {"content-type": "application/json"}
+    response = client.post("/api/setpoint", content=b"", headers=headers)
+    # /api/inlet_flow declares its body parameter, so FastAPI builds its error
+    reference = client.post("/api/inlet_flow", content=b"", headers=headers)
+
+    assert response.status_code == reference.status_code == 422
+    [error] = response.json()["detail"]
+    [expected] = reference.json()["detail"]
+    assert error["type"] == expected["type"] == "missing"
+    assert error["loc"] == expected["loc"] == ["body"]
+    assert error["msg"] == expected["msg"]
+
+
+def test_setpoint_malformed_json_matches_declared_body_error(client):
+    """Verify malformed /api/setpoint JSON gets FastAPI's json_invalid error."""
+    headers = {"content-type": "application/json"}
+    body = b'{"value": 3.0,}'
+    response = client.post("/api/setpoint", content=body, headers=headers)
+    reference = client.post("/api/inlet_flow", content=body, headers=headers)
+
+    assert response.status_code == reference.status_code == 422
+    assert response.json() == reference.json()
+    assert response.json()["detail"][0]["loc"] == ["body", 14]
+
+
+def test_setpoint_undecodable_body_matches_declared_body_error(client):
+    """Verify a body that is not valid UTF-8 gets FastAPI's 400 parse error."""
+    headers = {"content-type": "application/json"}
+    response = client.post("/api/setpoint", content=b"\xff", headers=headers)
+    reference = client.post("/api/inlet_flow", content=b"\xff", headers=headers)
+
+    assert response.status_code == reference.status_code == 400
+    assert response.json() == reference.json()
+
+
+def test_setpoint_non_object_json_matches_declared_body_error(client):
+    """Verify a JSON body that is not an object gets FastAPI's 422 error."""
+    headers = {"content-type": "application/json"}
+    response = client.post("/api/setpoint", content=b"[3.0]", headers=headers)
+    reference = client.post("/api/inlet_flow", content=b"[3.0]", headers=headers)
+
+    assert response.status_code == reference.status_code == 422
+    assert response.json() == reference.json()
+    assert response.json()["detail"][0]["type"] == "model_attributes_type"
+
+
+def test_setpoint_non_json_content_type_matches_declared_body_error(client):
+    """Verify a text/plain body is rejected like a declared body parameter."""
+    headers = {"content-type": "text/plain"}
+    body = b'{"value": 3.0}'
+    response = client.post("/api/setpoint", content=body, headers=headers)
+    reference = client.post("/api/inlet_flow", content=body, headers=headers)
+
+    assert response.status_code == reference.status_code == 422
+    assert response.json() == reference.json()
+
+
 def test_inlet_mode_constant(client):
     """Verify POST /api/inlet_mode can set constant mode."""
     payload = {"mode": "constant"}
@@ -219,3 +333,46 @@ def test_post_pid_gains_missing_fields(client):
     """Verify POST /api/pid with missing fields returns validation error."""
     response = client.post("/api/pid", json={"Kc": 1.5})
     assert response.status_code == 422
+
+
+def test_endpoints_report_uninitialized_simulation(client, monkeypatch):
+    """Verify requests made before the simulation is ready return a 500 error body."""
+    import api.main
+
+    monkeypatch.setattr(api.main, "simulation_manager", None)
+
+    response = client.get("/api/state")
+    assert response.status_code == 500
+    assert response.json() == {"error": "Simulation not initialized"}
+
+    response = client.post("/api/setpoint", json={"value": 3.0})
+    assert response.status_code == 500
+    assert response.json() == {"error": "Simulation not initialized"}
+
+
+def test_post_setpoint_unknown_field(client):
+    """Verify POST /api/setpoint with an unexpected field returns validation error."""
+    response = client.post("/api/setpoint", json={"value": 3.0, "units": "m"})
+    assert response.status_code == 422
+
+
+def test_unexpected_error_returns_500_with_cors_headers(client, monkeypatch):
+    """Verify an unexpected route error returns the 500 body with CORS headers.
+
+    The browser frontend can only read the error body if the response still
+    passes through CORSMiddleware.
+    """
+    from api.main import require_sim
+
+    class FailingManager:
+        def get_state(self):
+            raise RuntimeError("kaboom")
+
+    # Override the dependency rather than patching SimulationManager, which
+    # the running simulation thread also calls
+    monkeypatch.setitem(client.app.dependency_overrides, require_sim, FailingManager)
+
+    response = client.get("/api/state", headers={"Origin": "http://localhost:3000"})
+    assert response.status_code == 500
+    assert response.json() == {"error": "kaboom"}
+    assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
@@ -5,24 +5,30 @@ Tests WebSocket connection lifecycle, message handling, and command processing.
 """
 
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
 import httpx
-import pytest
+import orjson
 from starlette.testclient import TestClient
 
+from .conftest import recv, send_and_recv
+
+# Binary frames skip the str round trip on both sides of every message
+WS_URL = "/ws?frames=binary"
+
 
 def test_websocket_connection(client):
     """Verify that a client can connect to /ws endpoint successfully."""
-    with client.websocket_connect("/ws") as ws:
+    with client.websocket_connect(WS_URL) as ws:
         # Connection successful if we reach here
         assert ws is not None
 
 
 def test_websocket_receives_state_updates(client):
     """Connect to WebSocket and verify state update messages arrive periodically."""
-    with client.websocket_connect("/ws") as ws:
+    with client.websocket_connect(WS_URL) as ws:
         # Receive first state message
-        data1 = ws.receive_json()
+        data1 = recv(ws)
         assert data1["type"] == "state"
         assert "data" in data1
         assert "tank_level" in data1["data"]
@@ -30,106 +36,142 @@ def test_websocket_receives_state_updates(client):
         assert "inlet_flow" in data1["data"]
 
         # Receive second state message to verify continuous streaming
-        data2 = ws.receive_json()
+        data2 = recv(ws)
         assert data2["type"] == "state"
         assert "data" in data2
 
 
-def test_websocket_setpoint_command(client):
-    """Connect to WebSocket, send a setpoint command, and verify acceptance."""
+def test_websocket_binary_frames(client):
+    """Connect with ?frames=binary and verify state and error frames are bytes."""
+    with client.websocket_connect(WS_URL) as ws:
+        state = orjson.loads(ws.receive_bytes())
+        assert state["type"] == "state"
+        assert "tank_level" in state["data"]
+
+        ws.send_bytes(b'{"type": "unknown_command"}')
+        while True:
+            data = orjson.loads(ws.receive_bytes())
+            if data["type"] == "error":
+                break
+        assert "Unknown" in data["message"]
+
+
+def test_websocket_text_frames_by_default(client):
+    """Connect without ?frames and verify state and error frames are text."""
     with client.websocket_connect("/ws") as ws:
-        # Receive initial state
-        ws.receive_json()
+        state = orjson.loads(ws.receive_text())
+        assert state["type"] == "state"
+
+        ws.send_text('{"type": "unknown_command"}')
+        while True:
+            data = orjson.loads(ws.receive_text())
+            if data["type"] == "error":
+                break
+        assert "Unknown" in data["message"]
 
+
+def test_websocket_setpoint_command(client):
+    """Connect to WebSocket, send a setpoint command, and verify acceptance."""
+    with client.websocket_connect(WS_URL) as ws:
         # Send setpoint command
         command = {"type": "setpoint", "value": 3.0}
-        ws.send_json(command)
 
         # Should not receive error
-        data = ws.receive_json()
+        data = send_and_recv(ws, command)
         # If we get a state message, the command was accepted
         assert data["type"] in ["state", "error"]
-        if data["type"] == "error":
-            pytest.fail("Setpoint command was rejected")
+        assert (
+            data["type"] != "error"
+        ), f"Setpoint command was rejected: {data.get('message')}"
 
 
 def test_websocket_pid_command(client):
     """Send a PID gains command via WebSocket and verify acceptance."""
-    with client.websocket_connect("/ws") as ws:
-        # Receive initial state
-        ws.receive_json()
-
+    with client.websocket_connect(WS_URL) as ws:
         # Send PID command
         command = {"type": "pid", "Kc": 2.0, "tau_I": 120.0, "tau_D": 15.0}
-        ws.send_json(command)
 
         # Should not receive error immediately
-        data = ws.receive_json()
+        data = send_and_recv(ws, command)
         assert data["type"] in ["state", "error"]
-        if data["type"] == "error":
-            pytest.fail("PID command was rejected")
+        assert (
+            data["type"] != "error"
+        ), f"PID command was rejected: {data.get('message')}"
 
 
 def test_websocket_inlet_flow_command(client):
     """Send an inlet flow command via WebSocket and verify acceptance."""
-    with client.websocket_connect("/ws") as ws:
-        # Receive initial state
-        ws.receive_json()
-
+    with client.websocket_connect(WS_URL) as ws:
         # Send inlet flow command
         command = {"type": "inlet_flow", "value": 0.9}
-        ws.send_json(command)
 
         # Should not receive error
-        data = ws.receive_json()
+        data = send_and_recv(ws, command)
         assert data["type"] in ["state", "error"]
-        if data["type"] == "error":
-            pytest.fail("Inlet flow command was rejected")
+        assert (
+            data["type"] != "error"
+        ), f"Inlet flow command was rejected: {data.get('message')}"
 
 
 def test_websocket_invalid_json(client):
     """Send malformed JSON over WebSocket and verify error handling."""
-    with client.websocket_connect("/ws") as ws:
-        # Receive initial state
-        ws.receive_json()
-
+    with client.websocket_connect(WS_URL) as ws:
         # Send invalid JSON
         ws.send_text("{invalid json")
 
         # Should receive error message, not disconnect
-        data = ws.receive_json()
+        data = recv(ws)
         assert data["type"] == "error"
         assert "message" in data
 
 
+def test_websocket_binary_frame_command(client):
+    """Send a command as a binary frame and verify it is treated like text."""
+    with client.websocket_connect(WS_URL) as ws:
+        # Send an invalid command as bytes; the error proves it was parsed
+        ws.send_bytes(b'{"type": "setpoint"}')
+
+        data = recv(ws)
+        assert data["type"] == "error"
+        assert "value" in data["message"]
+
+
+def test_websocket_command_batch(client):
+    """Send several commands in one JSON array frame and verify each is handled."""
+    with client.websocket_connect(WS_URL) as ws:
+        # Two invalid commands so each one produces an observable reply
+        ws.send_bytes(orjson.dumps([{"type": "setpoint"}, {"type": "unknown_command"}]))
+
+        # State broadcasts may interleave with the replies
+        errors = []
+        while len(errors) < 2:
+            reply = recv(ws)
+            if reply["type"] == "error":
+                errors.append(reply)
+        assert "value" in errors[0]["message"]
+        assert "Unknown" in errors[1]["message"]
+
+
 def test_websocket_missing_fields(client):
     """Send a command with missing required fields and verify error."""
-    with client.websocket_connect("/ws") as ws:
-        # Receive initial state
-        ws.receive_json()
-
+    with client.websocket_connect(WS_URL) as ws:
         # Send setpoint command without value
         command = {"type": "setpoint"}
-        ws.send_json(command)
 
         # Should receive error message
-        data = ws.receive_json()
+        data = send_and_recv(ws, command)
         assert data["type"] == "error"
         assert "message" in data
 
 
 def test_websocket_invalid_command_type(client):
     """Send a message with unknown type and verify error response."""
-    with client.websocket_connect("/ws") as ws:
-        # Receive initial state
-        ws.receive_json()
-
+    with client.websocket_connect(WS_URL) as ws:
         # Send unknown command type
         command = {"type": "unknown_command", "value": 123}
-        ws.send_json(command)
 
         # Should receive error message
-        data = ws.receive_json()
+        data = send_and_recv(ws, command)
         assert data["type"] == "error"
         assert "Unknown" in data.get("message", "")
 
@@ -138,30 +180,27 @@ def test_websocket_multiple_clients(client):
     """Open multiple WebSocket connections and verify all receive updates."""
     # Note: TestClient lifespan is shared, so we can create multiple connections
     with (
-        client.websocket_connect("/ws") as ws1,
-        client.websocket_connect("/ws") as ws2,
-        client.websocket_connect("/ws") as ws3,
+        client.websocket_connect(WS_URL) as ws1,
+        client.websocket_connect(WS_URL) as ws2,
+        client.websocket_connect(WS_URL) as ws3,
     ):
-        # All clients should receive state updates
-        for ws in [ws1, ws2, ws3]:
-            data = ws.receive_json()
-            assert data["type"] == "state"
+        # All clients should receive state updates; wait on them concurrently
+        # so the receives overlap instead of queueing behind each other
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            for data in pool.map(recv, [ws1, ws2, ws3]):
+                assert data["type"] == "state"
 
-        # Close one connection and verify others still receive updates
-        ws1.close()
+            # Close one connection and verify others still receive updates
+            ws1.close()
 
-        # ws2 and ws3 should still receive updates
-        for ws in [ws2, ws3]:
-            data = ws.receive_json()
-            assert data["type"] == "state"
+            # ws2 and ws3 should still receive updates
+            for data in pool.map(recv, [ws2, ws3]):
+                assert data["type"] == "state"
 
 
 def test_websocket_inlet_mode_command(client):
     """Send an inlet mode command via WebSocket and verify acceptance."""
-    with client.websocket_connect("/ws") as ws:
-        # Receive initial state
-        ws.receive_json()
-
+    with client.websocket_connect(WS_URL) as ws:
         # Send inlet_mode command for brownian
         command = {
             "type": "inlet_mode",
@@ -170,10 +209,10 @@ def test_websocket_inlet_mode_command(client):
             "max": 1.2,
             "variance": 0.05,
         }
-        ws.send_json(command)
 
         # Should not receive error
-        data = ws.receive_json()
+        data = send_and_recv(ws, command)
         assert data["type"] in ["state", "error"]
-        if data["type"] == "error":
-            pytest.fail("Inlet mode command was rejected")
+        assert (
+            data["type"] != "error"
+        ), f"Inlet mode command was rejected: {data.get('message')}"
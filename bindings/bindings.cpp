@@ -30,6 +30,32 @@ std::string get_version() {
     return "0.1.0";
 }
 
+/**
+ * @brief Builds the standard level controller used by create_default_config().
+ *
+ * Reverse-acting PID (negative Kc) driving the outlet valve from the tank
+ * level, with anti-windup clamping. Building it in C++ replaces eleven
+ * Python property writes with one call.
+ *
+ * @return ControllerConfig with the default gains, limits and indices.
+ */
+tank_sim::Simulator::ControllerConfig create_default_controller_config() {
+    tank_sim::Simulator::ControllerConfig config;
+    config.gains = tank_sim::PIDController::Gains{
+        -1.0,  // Kc: reverse-acting for outlet valve
+        10.0,  // tau_I: 10 second integral time
+        1.0    // tau_D: 1 second derivative time
+    };
+    config.bias = 0.5;                     // Nominal valve position at setpoint
+    config.minOutputLimit = 0.0;           // Valve fully closed
+    config.maxOutputLimit = 1.0;           // Valve fully open
+    config.maxIntegralAccumulation = 10.0; // Anti-windup limit
+    config.measuredIndex = 0;              // Measure tank level (state 0)
+    config.outputIndex = 1;                // Control valve position (input 1)
+    config.initialSetpoint = 2.5;          // Target level: 2.5 m (50%)
+    return config;
+}
+
 /**
  * @brief pybind11 module definition
  *
@@ -196,6 +222,24 @@ PYBIND11_MODULE(_tank_sim, m) {
         .def_readwrite("initial_setpoint", &tank_sim::Simulator::ControllerConfig::initialSetpoint,
                       "Initial controller setpoint");
 
+    m.def("create_default_controller_config", &create_default_controller_config,
+          R"pbdoc(
+        Create the standard tank level controller configuration.
+
+        Returns a new ControllerConfig with a reverse-acting PID
+        (Kc=-1.0, tau_I=10.0, tau_D=1.0), bias 0.5, output limits
+        [0.0, 1.0], max_integral 10.0, measured_index 0, output_index 1
+        and initial_setpoint 2.5. Each call returns an independent object,
+        so callers can override individual fields.
+
+        Returns:
+            ControllerConfig: Default controller configuration.
+
+        Example:
+            >>> controller = create_default_controller_config()
+            >>> controller.initial_setpoint = 3.0
+    )pbdoc");
+
     // ========================================================================
     // Simulator::Config binding
     // ========================================================================
@@ -236,6 +280,10 @@ PYBIND11_MODULE(_tank_sim, m) {
                       "Tank physics parameters")
         .def_readwrite("controllers", &tank_sim::Simulator::Config::controllerConfig,
                       "List of controller configurations")
+        // The setters take Eigen::Ref, so a contiguous float64 array is read
+        // through the buffer protocol and copied into the config with a single
+        // memcpy; other dtypes or strides are converted first. The getters
+        // return copies: a view would dangle once a setter resized the vector.
         .def_property("initial_state",
                       [](const tank_sim::Simulator::Config& self) -> Eigen::VectorXd {
                           return self.initialState;
@@ -295,8 +343,11 @@ PYBIND11_MODULE(_tank_sim, m) {
                     original config object does not affect the simulator.
              )pbdoc")
 
-        // Core simulation method
-        .def("step", &tank_sim::Simulator::step, R"pbdoc(
+        // Core simulation method. The stepping and reset methods touch no
+        // Python objects, so they release the GIL; callers sharing one
+        // Simulator across threads must still serialize access themselves
+        .def("step", &tank_sim::Simulator::step,
+             py::call_guard<py::gil_scoped_release>(), R"pbdoc(
             Advance the simulation by one timestep.
 
             This method:
@@ -311,6 +362,131 @@ PYBIND11_MODULE(_tank_sim, m) {
                 None
         )pbdoc")
 
+        // Batched stepping: the loop runs in C++ with the GIL released
+        .def("step_n", &tank_sim::Simulator::stepN, py::arg("n"),
+             py::call_guard<py::gil_scoped_release>(), R"pbdoc(
+            Advance the simulation by n timesteps in a single call.
+
+            Equivalent to calling step() n times, without a Python round trip
+            per step.
+
+            Args:
+                n (int): Number of steps to run (0 is a no-op).
+
+            Raises:
+                ValueError: If n is negative.
+
+            Example:
+                >>> sim.step_n(100)  # 100 seconds at dt=1.0
+        )pbdoc")
+
+        .def("step_n_record",
+             py::overload_cast<int, int>(&tank_sim::Simulator::stepNRecord),
+             py::arg("n"), py::arg("state_index"),
+             py::call_guard<py::gil_scoped_release>(), R"pbdoc(
+            Advance the simulation by n timesteps, recording one state variable.
+
+            Args:
+                n (int): Number of steps to run.
+                state_index (int): Index of the state variable to record
+                                   (0 for tank level).
+
+            Returns:
+                numpy.ndarray: float64 array of length n holding the state
+                               variable after each step.
+
+            Raises:
+                ValueError: If n is negative.
+                IndexError: If state_index is out of range.
+
+            Example:
+                >>> levels = sim.step_n_record(50, 0)
+                >>> levels[-1] == sim.get_state()[0]
+                True
+        )pbdoc")
+
+        // Eigen::Ref<VectorXd> binds to a writable, contiguous float64 array
+        // without a copy, so the recorded values land in the caller's buffer
+        .def("step_n_record",
+             py::overload_cast<int, int, Eigen::Ref<Eigen::VectorXd>>(
+                 &tank_sim::Simulator::stepNRecord),
+             py::arg("n"), py::arg("state_index"), py::arg("out"),
+             py::call_guard<py::gil_scoped_release>(), R"pbdoc(
+            Advance the simulation by n timesteps, recording into a buffer.
+
+            Same as step_n_record(n, state_index) but writes into a
+            preallocated array instead of allocating a new one.
+
+            Args:
+                n (int): Number of steps to run.
+                state_index (int): Index of the state variable to record.
+                out (numpy.ndarray): Writable, contiguous float64 array of
+                                     length n.
+
+            Raises:
+                ValueError: If n is negative or len(out) != n.
+                IndexError: If state_index is out of range.
+                TypeError: If out is not a writable float64 array.
+
+            Example:
+                >>> levels = np.empty(50)
+                >>> sim.step_n_record(50, 0, levels)
+        )pbdoc")
+
+        .def("run_until", &tank_sim::Simulator::runUntil,
+             py::arg("max_steps"), py::arg("tol"), py::arg("controller_index"),
+             py::call_guard<py::gil_scoped_release>(), R"pbdoc(
+            Step until a controller's error is within tolerance.
+
+            Runs up to max_steps timesteps, stopping after the first step at
+            which abs(get_error(controller_index)) < tol.
+
+            Args:
+                max_steps (int): Maximum number of steps to run.
+                tol (float): Convergence tolerance on the control error.
+                controller_index (int): Controller whose error is checked.
+
+            Returns:
+                tuple[int, bool]: Steps taken and whether the error came
+                                  within tol (False after max_steps steps
+                                  without converging).
+
+            Raises:
+                ValueError: If max_steps is negative.
+                IndexError: If controller_index is out of range.
+
+            Example:
+                >>> sim.set_setpoint(0, 3.0)
+                >>> steps, converged = sim.run_until(200, 0.005, 0)
+        )pbdoc")
+
+        .def("step_until_saturated", &tank_sim::Simulator::stepUntilSaturated,
+             py::arg("controller_index"), py::arg("bound"), py::arg("tol"),
+             py::arg("max_steps"), py::call_guard<py::gil_scoped_release>(), R"pbdoc(
+            Step until a controller's output reaches a bound.
+
+            Runs up to max_steps timesteps, stopping after the first step at
+            which abs(get_controller_output(controller_index) - bound) < tol.
+
+            Args:
+                controller_index (int): Controller whose output is checked.
+                bound (float): Output value to reach (e.g. min_output).
+                tol (float): Tolerance on the distance to the bound.
+                max_steps (int): Maximum number of steps to run.
+
+            Returns:
+                tuple[int, float]: Steps taken (max_steps if the bound was
+                                   never reached) and the final output.
+
+            Raises:
+                ValueError: If max_steps is negative.
+                IndexError: If controller_index is out of range.
+
+            Example:
+                >>> sim.set_setpoint(0, 10.0)
+                >>> steps, output = sim.step_until_saturated(0, 0.0, 0.01, 100)
+        )pbdoc")
+
         // State getters (all const, non-modifying)
         .def("get_time", &tank_sim::Simulator::getTime, R"pbdoc(
             Get the current simulation time in seconds.
@@ -319,7 +495,11 @@ PYBIND11_MODULE(_tank_sim, m) {
                 float: Elapsed time since initialization.
         )pbdoc")
 
-        .def("get_state", &tank_sim::Simulator::getState, R"pbdoc(
+        // The vector getters return const references, so with
+        // reference_internal pybind11 wraps the simulator's own buffer in a
+        // read-only array (no allocation or copy) that keeps the simulator alive
+        .def("get_state", &tank_sim::Simulator::getState,
+             py::return_value_policy::reference_internal, R"pbdoc(
             Get the current state vector as a numpy array.
 
             For a single tank, this is a 1D array with one element: [level_m].
@@ -328,11 +508,30 @@ PYBIND11_MODULE(_tank_sim, m) {
                 numpy.ndarray: Current state vector (float64, 1D array).
 
             Note:
-                The returned array is a copy. Modifying it does not affect the
-                simulator. Use set_state() or reset() to change state.
+                The returned array is a read-only view of the simulator's
+                state and reflects later steps and resets. Call .copy() to
+                keep a snapshot. Use reset() to change state.
         )pbdoc")
 
-        .def("get_inputs", &tank_sim::Simulator::getInputs, R"pbdoc(
+        .def("get_state_scalar", &tank_sim::Simulator::getStateScalar,
+             py::arg("index"), R"pbdoc(
+            Get a single state variable as a float.
+
+            Cheaper than get_state()[index] in tight loops because no numpy
+            array or numpy scalar is created.
+
+            Args:
+                index (int): State index (0 = tank level for a single tank).
+
+            Returns:
+                float: Current value of the state variable.
+
+            Raises:
+                IndexError: If index is out of range.
+        )pbdoc")
+
+        .def("get_inputs", &tank_sim::Simulator::getInputs,
+             py::return_value_policy::reference_internal, R"pbdoc(
             Get the current input vector as a numpy array.
 
             This is a 1D array [q_in, valve_position] where:
@@ -343,20 +542,15 @@ PYBIND11_MODULE(_tank_sim, m) {
                 numpy.ndarray: Current inputs vector (float64, 1D array).
 
             Note:
-                Use set_input() to modify individual inputs.
+                The returned array is a read-only view that tracks the
+                simulator; call .copy() to keep a snapshot. Use set_input()
+                to modify individual inputs.
         )pbdoc")
 
-        .def("get_setpoint", 
-             [](const tank_sim::Simulator& self, int index) {
-                 if (index < 0 || index >= self.getControllerCount()) {
-                     throw py::index_error(
-                         "Controller index " + std::to_string(index) + 
-                         " out of range (have " + std::to_string(self.getControllerCount()) + 
-                         " controller" + (self.getControllerCount() == 1 ? "" : "s") + ")"
-                     );
-                 }
-                 return self.getSetpoint(index);
-             },
+        // Per-controller accessors bind the member functions directly: they
+        // bounds-check the index themselves and throw std::out_of_range,
+        // which pybind11 translates to IndexError
+        .def("get_setpoint", &tank_sim::Simulator::getSetpoint,
              py::arg("index"), R"pbdoc(
             Get the setpoint for a specific controller.
 
@@ -374,17 +568,7 @@ PYBIND11_MODULE(_tank_sim, m) {
                 >>> setpoint = sim.get_setpoint(0)  # First controller
         )pbdoc")
 
-        .def("get_controller_output",
-             [](const tank_sim::Simulator& self, int index) {
-                 if (index < 0 || index >= self.getControllerCount()) {
-                     throw py::index_error(
-                         "Controller index " + std::to_string(index) + 
-                         " out of range (have " + std::to_string(self.getControllerCount()) + 
-                         " controller" + (self.getControllerCount() == 1 ? "" : "s") + ")"
-                     );
-                 }
-                 return self.getControllerOutput(index);
-             },
+        .def("get_controller_output", &tank_sim::Simulator::getControllerOutput,
              py::arg("index"), R"pbdoc(
             Get the control output from a specific controller.
 
@@ -404,17 +588,7 @@ PYBIND11_MODULE(_tank_sim, m) {
                 >>> output = sim.get_controller_output(0)  # Valve position
         )pbdoc")
 
-        .def("get_error",
-             [](const tank_sim::Simulator& self, int index) {
-                 if (index < 0 || index >= self.getControllerCount()) {
-                     throw py::index_error(
-                         "Controller index " + std::to_string(index) + 
-                         " out of range (have " + std::to_string(self.getControllerCount()) + 
-                         " controller" + (self.getControllerCount() == 1 ? "" : "s") + ")"
-                     );
-                 }
-                 return self.getError(index);
-             },
+        .def("get_error", &tank_sim::Simulator::getError,
              py::arg("index"), R"pbdoc(
             Get the current control error for a specific controller.
 
@@ -433,6 +607,28 @@ PYBIND11_MODULE(_tank_sim, m) {
                 >>> error = sim.get_error(0)  # How far from setpoint?
         )pbdoc")
 
+        .def("state_bit_equal", &tank_sim::Simulator::stateBitEqual,
+             py::arg("other"), R"pbdoc(
+            Check whether another simulator holds exactly the same state.
+
+            Compares the raw bytes of the state vectors, so there is no
+            tolerance and no numpy temporaries: -0.0 and 0.0 differ, while
+            two NaNs with the same bit pattern match. Intended for
+            reproducibility checks.
+
+            Args:
+                other (Simulator): Simulator to compare against.
+
+            Returns:
+                bool: True if both state vectors are bitwise identical.
+
+            Example:
+                >>> sim1.step_n(50)
+                >>> sim2.step_n(50)
+                >>> sim1.state_bit_equal(sim2)
+                True
+        )pbdoc")
+
         // Setters (modify simulator state for next step)
         .def("set_input", &tank_sim::Simulator::setInput,
              py::arg("index"), py::arg("value"), R"pbdoc(
@@ -452,17 +648,7 @@ PYBIND11_MODULE(_tank_sim, m) {
                 >>> sim.set_input(0, 1.2)  # Change inlet flow to 1.2 m³/s
         )pbdoc")
 
-        .def("set_setpoint",
-             [](tank_sim::Simulator& self, int index, double value) {
-                 if (index < 0 || index >= self.getControllerCount()) {
-                     throw py::index_error(
-                         "Controller index " + std::to_string(index) + 
-                         " out of range (have " + std::to_string(self.getControllerCount()) + 
-                         " controller" + (self.getControllerCount() == 1 ? "" : "s") + ")"
-                     );
-                 }
-                 self.setSetpoint(index, value);
-             },
+        .def("set_setpoint", &tank_sim::Simulator::setSetpoint,
              py::arg("index"), py::arg("value"), R"pbdoc(
             Change the setpoint for a specific controller.
 
@@ -480,17 +666,7 @@ PYBIND11_MODULE(_tank_sim, m) {
                 >>> sim.set_setpoint(0, 3.5)  # New level target: 3.5 meters
         )pbdoc")
 
-        .def("set_controller_gains",
-             [](tank_sim::Simulator& self, int index, const tank_sim::PIDController::Gains& gains) {
-                 if (index < 0 || index >= self.getControllerCount()) {
-                     throw py::index_error(
-                         "Controller index " + std::to_string(index) + 
-                         " out of range (have " + std::to_string(self.getControllerCount()) + 
-                         " controller" + (self.getControllerCount() == 1 ? "" : "s") + ")"
-                     );
-                 }
-                 self.setControllerGains(index, gains);
-             },
+        .def("set_controller_gains", &tank_sim::Simulator::setControllerGains,
              py::arg("index"), py::arg("gains"), R"pbdoc(
             Dynamically retune a controller's PID gains.
 
@@ -512,7 +688,8 @@ PYBIND11_MODULE(_tank_sim, m) {
                 >>> sim.set_controller_gains(0, new_gains)
         )pbdoc")
 
-        .def("reset", &tank_sim::Simulator::reset, R"pbdoc(
+        .def("reset", &tank_sim::Simulator::reset,
+             py::call_guard<py::gil_scoped_release>(), R"pbdoc(
             Reset the simulator to initial conditions.
 
             This resets:
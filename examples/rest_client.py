@@ -10,14 +10,35 @@ Usage:
 
 Requirements:
     - requests library (install with: pip install requests)
+    - numpy library (install with: pip install numpy)
+    - orjson library, optional (install with: pip install orjson)
     - API server running on localhost:8000
 """
 
 import json
 import logging
 import time
+from typing import Any
 
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+
+# Prefer orjson for request bodies and responses; fall back to the stdlib.
+# websocket_client.py carries the same fallback: each example is a single
+# self-contained script, so the few lines are repeated rather than shared.
+try:
+    import orjson
+
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+
+    def _dumps(obj: Any, /) -> bytes:
+        return json.dumps(obj).encode()
+
+    _loads = json.loads
+
 
 # Configure logging
 logging.basicConfig(
@@ -29,11 +50,23 @@ logger = logging.getLogger(__name__)
 # API base URL
 API_URL = "http://localhost:8000"
 
+# One session for every call, so requests reuse a kept-alive connection
+# instead of opening a new one each time
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def post_json(path, payload):
+    """POST a pre-encoded JSON body to the API."""
+    return SESSION.post(f"{API_URL}{path}", data=_dumps(payload), headers=JSON_HEADERS)
+
 
 def print_json(data, title=""):
     """Pretty-print JSON data."""
     if title:
-        logger.info(f"\n{title}")
+        logger.info("\n%s", title)
     print(json.dumps(data, indent=2))
 
 
@@ -41,12 +74,12 @@ def check_health():
     """Check API health status."""
     logger.info("1. Health Check")
     try:
-        response = requests.get(f"{API_URL}/api/health")
+        response = SESSION.get(f"{API_URL}/api/health")
         response.raise_for_status()
-        logger.info(f"Status: {response.json()['status']}")
+        logger.info("Status: %s", _loads(response.content)["status"])
         return True
     except requests.exceptions.RequestException as e:
-        logger.error(f"Health check failed: {e}")
+        logger.error("Health check failed: %s", e)
         return False
 
 
@@ -54,26 +87,28 @@ def get_config():
     """Retrieve simulation configuration."""
     logger.info("\n2. Get Configuration")
     try:
-        response = requests.get(f"{API_URL}/api/config")
+        response = SESSION.get(f"{API_URL}/api/config")
         response.raise_for_status()
-        config = response.json()
-
-        logger.info("Configuration retrieved:")
-        logger.info(f"  Tank height: {config['tank_height']} m")
-        logger.info(f"  Tank area: {config['tank_area']} m²")
-        logger.info(f"  Valve k_v: {config['valve_coefficient']}")
-        logger.info(f"  Initial level: {config['initial_level']} m")
-        logger.info(f"  Initial setpoint: {config['initial_setpoint']} m")
-        logger.info(f"  PID Gains:")
-        logger.info(f"    Kc: {config['pid_gains']['Kc']}")
-        logger.info(f"    tau_I: {config['pid_gains']['tau_I']} s")
-        logger.info(f"    tau_D: {config['pid_gains']['tau_D']} s")
-        logger.info(f"  History capacity: {config['history_capacity']} entries")
-        logger.info(f"  Current history size: {config['history_size']} entries")
+        config = _loads(response.content)
+
+        if logger.isEnabledFor(logging.INFO):
+            gains = config["pid_gains"]
+            logger.info("Configuration retrieved:")
+            logger.info("  Tank height: %s m", config["tank_height"])
+            logger.info("  Tank area: %s m²", config["tank_area"])
+            logger.info("  Valve k_v: %s", config["valve_coefficient"])
+            logger.info("  Initial level: %s m", config["initial_level"])
+            logger.info("  Initial setpoint: %s m", config["initial_setpoint"])
+            logger.info("  PID Gains:")
+            logger.info("    Kc: %s", gains["Kc"])
+            logger.info("    tau_I: %s s", gains["tau_I"])
+            logger.info("    tau_D: %s s", gains["tau_D"])
+            logger.info("  History capacity: %s entries", config["history_capacity"])
+            logger.info("  Current history size: %s entries", config["history_size"])
 
         return config
     except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to get config: {e}")
+        logger.error("Failed to get config: %s", e)
         return None
 
 
@@ -81,125 +116,157 @@ def get_state():
     """Retrieve current simulation state."""
     logger.info("\n3. Get Current State")
     try:
-        response = requests.get(f"{API_URL}/api/state")
+        response = SESSION.get(f"{API_URL}/api/state")
         response.raise_for_status()
-        state = response.json()
-
-        logger.info("Current simulation state:")
-        logger.info(f"  Time: {state['time']:.1f} s")
-        logger.info(f"  Tank level: {state['tank_level']:.3f} m")
-        logger.info(f"  Setpoint: {state['setpoint']:.3f} m")
-        logger.info(f"  Error: {state['error']:.3f} m")
-        logger.info(f"  Inlet flow: {state['inlet_flow']:.3f} m³/s")
-        logger.info(f"  Outlet flow: {state['outlet_flow']:.3f} m³/s")
-        logger.info(f"  Valve position: {state['valve_position']:.3f}")
-        logger.info(f"  Controller output: {state['controller_output']:.3f}")
+        state = _loads(response.content)
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Current simulation state:")
+            logger.info("  Time: %.1f s", state["time"])
+            logger.info("  Tank level: %.3f m", state["tank_level"])
+            logger.info("  Setpoint: %.3f m", state["setpoint"])
+            logger.info("  Error: %.3f m", state["error"])
+            logger.info("  Inlet flow: %.3f m³/s", state["inlet_flow"])
+            logger.info("  Outlet flow: %.3f m³/s", state["outlet_flow"])
+            logger.info("  Valve position: %.3f", state["valve_position"])
+            logger.info("  Controller output: %.3f", state["controller_output"])
 
         return state
     except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to get state: {e}")
+        logger.error("Failed to get state: %s", e)
         return None
 
 
+def wait_then_get_state(seconds):
+    """Let the simulation run for a few seconds, then fetch the state."""
+    time.sleep(seconds)
+    return get_state()
+
+
 def set_setpoint(value):
     """Change the controller setpoint."""
-    logger.info(f"\n4. Set Setpoint to {value} m")
+    logger.info("\n4. Set Setpoint to %s m", value)
     try:
-        response = requests.post(f"{API_URL}/api/setpoint", json={"value": value})
+        response = post_json("/api/setpoint", {"value": value})
         response.raise_for_status()
-        logger.info(f"Response: {response.json()['message']}")
+        logger.info("Response: %s", _loads(response.content)["message"])
         return True
     except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to set setpoint: {e}")
+        logger.error("Failed to set setpoint: %s", e)
         return False
 
 
 def set_pid_gains(Kc, tau_I, tau_D):
     """Update PID controller gains."""
-    logger.info(f"\n5. Update PID Gains")
-    logger.info(f"  Kc: {Kc}, tau_I: {tau_I}, tau_D: {tau_D}")
+    logger.info("\n5. Update PID Gains")
+    logger.info("  Kc: %s, tau_I: %s, tau_D: %s", Kc, tau_I, tau_D)
     try:
-        response = requests.post(
-            f"{API_URL}/api/pid", json={"Kc": Kc, "tau_I": tau_I, "tau_D": tau_D}
-        )
+        response = post_json("/api/pid", {"Kc": Kc, "tau_I": tau_I, "tau_D": tau_D})
         response.raise_for_status()
-        result = response.json()
-        logger.info(f"Response: {result['message']}")
+        result = _loads(response.content)
+        logger.info("Response: %s", result["message"])
         return True
     except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to update PID gains: {e}")
+        logger.error("Failed to update PID gains: %s", e)
         return False
 
 
 def set_inlet_flow(value):
     """Set inlet flow rate."""
-    logger.info(f"\n6. Set Inlet Flow to {value} m³/s")
+    logger.info("\n6. Set Inlet Flow to %s m³/s", value)
     try:
-        response = requests.post(f"{API_URL}/api/inlet_flow", json={"value": value})
+        response = post_json("/api/inlet_flow", {"value": value})
         response.raise_for_status()
-        logger.info(f"Response: {response.json()['message']}")
+        logger.info("Response: %s", _loads(response.content)["message"])
         return True
     except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to set inlet flow: {e}")
+        logger.error("Failed to set inlet flow: %s", e)
         return False
 
 
 def set_inlet_mode(mode, min_flow=0.8, max_flow=1.2, variance=0.05):
     """Switch inlet mode between constant and brownian."""
-    logger.info(f"\n7. Set Inlet Mode to '{mode}'")
+    logger.info("\n7. Set Inlet Mode to '%s'", mode)
     if mode == "brownian":
         logger.info(
-            f"  Min flow: {min_flow}, Max flow: {max_flow}, Variance: {variance}"
+            "  Min flow: %s, Max flow: %s, Variance: %s", min_flow, max_flow, variance
         )
     try:
-        response = requests.post(
-            f"{API_URL}/api/inlet_mode",
-            json={"mode": mode, "min": min_flow, "max": max_flow, "variance": variance},
+        response = post_json(
+            "/api/inlet_mode",
+            {"mode": mode, "min": min_flow, "max": max_flow, "variance": variance},
         )
         response.raise_for_status()
-        result = response.json()
-        logger.info(f"Response: {result['message']}")
+        result = _loads(response.content)
+        logger.info("Response: %s", result["message"])
         return True
     except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to set inlet mode: {e}")
+        logger.error("Failed to set inlet mode: %s", e)
         return False
 
 
 def get_history(duration=300):
-    """Retrieve historical data points."""
-    logger.info(f"\n8. Get History (last {duration} seconds)")
+    """
+    Retrieve historical data points.
+
+    The history is requested as NDJSON and streamed; each line is decoded
+    as it arrives, and only when the statistics will be logged.
+
+    Returns:
+        List of NDJSON lines (bytes), one per data point, or None on error.
+    """
+    logger.info("\n8. Get History (last %s seconds)", duration)
     try:
-        response = requests.get(f"{API_URL}/api/history", params={"duration": duration})
+        response = SESSION.get(
+            f"{API_URL}/api/history",
+            params={"duration": duration, "format": "ndjson"},
+            stream=True,
+        )
         response.raise_for_status()
-        history = response.json()
 
-        logger.info(f"Retrieved {len(history)} data points:")
-
-        if history:
+        # The samples and statistics are only for display, so skip them
+        # entirely when INFO is filtered out
+        show = logger.isEnabledFor(logging.INFO)
+        history = []
+        levels = []
+        for line in response.iter_lines():
+            if not line:
+                continue
+            history.append(line)
+            if show:
+                levels.append(_loads(line)["tank_level"])
+
+        logger.info("Retrieved %d data points:", len(history))
+
+        if history and show:
             # Show first, middle, and last points
             sample_indices = [0, len(history) // 2, -1]
             for i in sample_indices:
-                h = history[i]
+                h = _loads(history[i])
                 logger.info(
-                    f"  [{h['time']:7.1f}s] Level: {h['tank_level']:5.2f}m, "
-                    f"Setpoint: {h['setpoint']:5.2f}m, Error: {h['error']:6.2f}m"
+                    "  [%7.1fs] Level: %5.2fm, Setpoint: %5.2fm, Error: %6.2fm",
+                    h["time"],
+                    h["tank_level"],
+                    h["setpoint"],
+                    h["error"],
                 )
 
-            # Calculate statistics
-            levels = [h["tank_level"] for h in history]
-            avg_level = sum(levels) / len(levels)
-            min_level = min(levels)
-            max_level = max(levels)
+            # Calculate statistics. A NaN level is serialized as null, which
+            # becomes NaN again in the float array and is skipped below.
+            level_array = np.array(levels, dtype=np.float64)
+            avg_level = np.nanmean(level_array)
+            min_level = np.nanmin(level_array)
+            max_level = np.nanmax(level_array)
 
-            logger.info(f"Level statistics:")
-            logger.info(f"  Average: {avg_level:.3f} m")
-            logger.info(f"  Min: {min_level:.3f} m")
-            logger.info(f"  Max: {max_level:.3f} m")
-            logger.info(f"  Range: {max_level - min_level:.3f} m")
+            logger.info("Level statistics:")
+            logger.info("  Average: %.3f m", avg_level)
+            logger.info("  Min: %.3f m", min_level)
+            logger.info("  Max: %.3f m", max_level)
+            logger.info("  Range: %.3f m", max_level - min_level)
 
         return history
     except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to get history: {e}")
+        logger.error("Failed to get history: %s", e)
         return None
 
 
@@ -207,12 +274,12 @@ def reset_simulation():
     """Reset simulation to initial conditions."""
     logger.info("\n9. Reset Simulation")
     try:
-        response = requests.post(f"{API_URL}/api/reset")
+        response = SESSION.post(f"{API_URL}/api/reset")
         response.raise_for_status()
-        logger.info(f"Response: {response.json()['message']}")
+        logger.info("Response: %s", _loads(response.content)["message"])
         return True
     except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to reset: {e}")
+        logger.error("Failed to reset: %s", e)
         return False
 
 
@@ -244,32 +311,27 @@ def main():
     # Set a new setpoint
     if set_setpoint(3.5):
         logger.info("Waiting 10 seconds for controller to respond...")
-        time.sleep(10)
-        get_state()
+        wait_then_get_state(10)
 
     # Update PID gains
     if set_pid_gains(Kc=1.5, tau_I=8.0, tau_D=2.0):
         logger.info("Waiting 5 seconds...")
-        time.sleep(5)
-        get_state()
+        wait_then_get_state(5)
 
     # Change inlet flow
     if set_inlet_flow(1.2):
         logger.info("Waiting 5 seconds...")
-        time.sleep(5)
-        get_state()
+        wait_then_get_state(5)
 
     # Switch to Brownian inlet mode
     if set_inlet_mode("brownian", min_flow=0.8, max_flow=1.2, variance=0.05):
         logger.info("Waiting 10 seconds with Brownian disturbance...")
-        time.sleep(10)
-        get_state()
+        wait_then_get_state(10)
 
     # Switch back to constant
     if set_inlet_mode("constant"):
         logger.info("Waiting 5 seconds...")
-        time.sleep(5)
-        get_state()
+        wait_then_get_state(5)
 
     # Get history from last 5 minutes
     get_history(duration=300)
@@ -280,8 +342,7 @@ def main():
     logger.info("=" * 70)
     reset_simulation()
     logger.info("Waiting 2 seconds after reset...")
-    time.sleep(2)
-    get_state()
+    wait_then_get_state(2)
 
     logger.info("\n" + "=" * 70)
     logger.info("API Examples Complete")
@@ -295,5 +356,5 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         logger.info("\nInterrupted by user")
     except Exception as e:
-        logger.error(f"Fatal error: {e}")
+        logger.error("Fatal error: %s", e)
         exit(1)
@@ -10,16 +10,38 @@ Usage:
 
 Requirements:
     - websockets library (install with: pip install websockets)
+    - orjson library, optional (install with: pip install orjson)
+    - uvloop library, optional (install with: pip install uvloop)
     - API server running on localhost:8000
 """
 
 import asyncio
 import json
 import logging
-from datetime import datetime
+from typing import Any
 
 import websockets
 
+# Prefer orjson for the per-message encode/decode; fall back to the stdlib.
+# Both paths produce bytes, which websockets sends as-is.
+try:
+    import orjson
+
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+
+    def _dumps(obj: Any, /) -> bytes:
+        return json.dumps(obj).encode()
+
+    _loads = json.loads
+
+# uvloop gives a faster event loop where available (it does not support Windows)
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -27,11 +49,38 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Commands queued within this window go out together as one JSON array frame
+OUTBOX_FLUSH_INTERVAL = 0.05  # seconds
+OUTBOX_MAX_COMMANDS = 16
+
+# The demo always sends the same commands, so encode them once up front
+SETPOINT_CMD = _dumps({"type": "setpoint", "value": 3.5})
+PID_CMD = _dumps({"type": "pid", "Kc": 1.5, "tau_I": 8.0, "tau_D": 2.0})
+BROWNIAN_CMD = _dumps(
+    {
+        "type": "inlet_mode",
+        "mode": "brownian",
+        "min": 0.8,
+        "max": 1.2,
+        "variance": 0.05,
+    }
+)
+CONSTANT_CMD = _dumps(
+    {
+        "type": "inlet_mode",
+        "mode": "constant",
+        "min": 0.8,
+        "max": 1.2,
+    }
+)
+RESTORE_SETPOINT_CMD = _dumps({"type": "setpoint", "value": 2.5})
+
 
 async def main():
     """Connect to WebSocket endpoint and demonstrate command/state interaction."""
 
-    uri = "ws://localhost:8000/ws"
+    # Binary frames arrive as bytes, which the JSON decoder parses directly
+    uri = "ws://localhost:8000/ws?frames=binary"
     logger.info(f"Connecting to {uri}...")
 
     try:
@@ -40,7 +89,32 @@ async def main():
 
             # Track received state updates
             state_count = 0
-            start_time = datetime.now()
+
+            # Encoded commands waiting to be sent
+            outbox: list[bytes] = []
+
+            async def flush():
+                """Send every queued command in a single frame."""
+                if not outbox:
+                    return
+                if len(outbox) == 1:
+                    frame = outbox[0]
+                else:
+                    frame = b"[" + b",".join(outbox) + b"]"
+                outbox.clear()
+                await websocket.send(frame)
+
+            async def queue_command(command: bytes):
+                """Queue an encoded command; it is sent on the next flush."""
+                outbox.append(command)
+                if len(outbox) >= OUTBOX_MAX_COMMANDS:
+                    await flush()
+
+            async def flush_periodically():
+                """Flush the outbox every OUTBOX_FLUSH_INTERVAL seconds."""
+                while True:
+                    await asyncio.sleep(OUTBOX_FLUSH_INTERVAL)
+                    await flush()
 
             # Create a task to send commands after delays
             async def send_commands():
@@ -49,43 +123,24 @@ async def main():
                 # Wait 5 seconds then change setpoint
                 await asyncio.sleep(5)
                 logger.info("Sending setpoint command: 3.5m")
-                await websocket.send(json.dumps({"type": "setpoint", "value": 3.5}))
+                await queue_command(SETPOINT_CMD)
 
                 # Wait another 5 seconds (10 total) and update PID gains
                 await asyncio.sleep(5)
                 logger.info("Sending PID tuning command")
-                await websocket.send(
-                    json.dumps({"type": "pid", "Kc": 1.5, "tau_I": 8.0, "tau_D": 2.0})
-                )
+                await queue_command(PID_CMD)
 
                 # Wait another 5 seconds (15 total) and switch to Brownian inlet mode
                 await asyncio.sleep(5)
                 logger.info("Switching to Brownian inlet mode")
-                await websocket.send(
-                    json.dumps(
-                        {
-                            "type": "inlet_mode",
-                            "mode": "brownian",
-                            "min": 0.8,
-                            "max": 1.2,
-                            "variance": 0.05,
-                        }
-                    )
-                )
-
-                # Wait another 5 seconds (20 total) and switch back to constant
+                await queue_command(BROWNIAN_CMD)
+
+                # Wait another 5 seconds (20 total), switch back to constant and
+                # restore the setpoint; both commands share one frame
                 await asyncio.sleep(5)
-                logger.info("Switching back to constant inlet mode")
-                await websocket.send(
-                    json.dumps(
-                        {
-                            "type": "inlet_mode",
-                            "mode": "constant",
-                            "min": 0.8,
-                            "max": 1.2,
-                        }
-                    )
-                )
+                logger.info("Switching back to constant inlet mode, setpoint 2.5m")
+                await queue_command(CONSTANT_CMD)
+                await queue_command(RESTORE_SETPOINT_CMD)
 
             # Create a task to receive state updates
             async def receive_states():
@@ -94,15 +149,22 @@ async def main():
 
                 try:
                     async for message in websocket:
-                        data = json.loads(message)
+                        data = _loads(message)
 
-                        # Handle state updates
+                        # Handle state updates. When the server falls behind
+                        # it coalesces waiting ticks into one state_batch
+                        # frame, oldest first.
                         if data["type"] == "state":
+                            points = [data["data"]]
+                        elif data["type"] == "state_batch":
+                            points = data["points"]
+                        else:
+                            points = []
+
+                        for state_data in points:
                             state_count += 1
-                            state_data = data["data"]
 
                             # Display state nicely
-                            elapsed = (datetime.now() - start_time).total_seconds()
                             logger.info(
                                 f"[{state_count:3d}] Time: {state_data['time']:7.1f}s | "
                                 f"Level: {state_data['tank_level']:5.2f}m | "
@@ -113,7 +175,7 @@ async def main():
                             )
 
                         # Handle error messages
-                        elif data["type"] == "error":
+                        if data["type"] == "error":
                             logger.error(f"Server error: {data['message']}")
 
                         # Stop after 30 updates (30 seconds at 1 Hz)
@@ -127,10 +189,13 @@ async def main():
                     logger.error(f"Error receiving message: {e}")
 
             # Run both command sending and state receiving concurrently
+            flusher = asyncio.create_task(flush_periodically())
             try:
                 await asyncio.gather(send_commands(), receive_states())
             except asyncio.CancelledError:
                 pass
+            finally:
+                flusher.cancel()
 
             logger.info(f"Disconnected. Received {state_count} state updates.")
 
@@ -146,7 +211,10 @@ async def main():
 if __name__ == "__main__":
     """Run the WebSocket client."""
     try:
-        asyncio.run(main())
+        if uvloop is not None:
+            uvloop.run(main())
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("Interrupted by user")
     except Exception as e:
@@ -51,9 +51,12 @@ export function useWebSocket(): {
     });
 
     const unsubMessage = client.on("message", (data: unknown) => {
-      const msg = data as { type?: string; data?: unknown };
+      const msg = data as { type?: string; data?: unknown; points?: unknown[] };
       if (msg.type === "state" && msg.data) {
         setState(msg.data as SimulationState);
+      } else if (msg.type === "state_batch" && msg.points?.length) {
+        // Several ticks coalesced into one frame; the newest is last
+        setState(msg.points[msg.points.length - 1] as SimulationState);
       } else if (msg.type === "error") {
         const errMsg = msg as { message?: string };
         setError(errMsg.message || "Server error");
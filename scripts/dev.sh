@@ -101,7 +101,8 @@ cd "$PROJECT_ROOT"
     --reload-dir api \
     --reload-dir tank_sim \
     --host 0.0.0.0 \
-    --port 8000 &
+    --port 8000 \
+    --ws-per-message-deflate false &
 BACKEND_PID=$!
 
 # Start frontend (explicit --port 3000 to fail fast if port is still busy)
@@ -1,5 +1,7 @@
 #include "simulator.h"
 #include "constants.h"
+#include <cmath>
+#include <cstring>
 
 namespace tank_sim {
 
@@ -89,7 +91,11 @@ void Simulator::step() {
   // - Current state vector
   // - Current input vector (from PREVIOUS timestep)
   // - Derivative function
-  state = stepper.step(time, dt, state, inputs, derivative_func);
+  //
+  // noalias() copies the result into the existing buffer instead of
+  // move-assigning it: Python holds read-only views of `state`, so its
+  // storage must stay put for the lifetime of the simulator
+  state.noalias() = stepper.step(time, dt, state, inputs, derivative_func);
 
   // Step 2: Advance simulation time
   time += dt;
@@ -121,15 +127,120 @@ void Simulator::step() {
   }
 }
 
+void Simulator::stepN(int n) {
+  if (n < 0) {
+    throw std::invalid_argument("Step count must be non-negative, got " +
+                                std::to_string(n));
+  }
+  for (int i = 0; i < n; ++i) {
+    step();
+  }
+}
+
+Eigen::VectorXd Simulator::stepNRecord(int n, int stateIndex) {
+  if (n < 0) {
+    throw std::invalid_argument("Step count must be non-negative, got " +
+                                std::to_string(n));
+  }
+  Eigen::VectorXd record(n);
+  stepNRecord(n, stateIndex, record);
+  return record;
+}
+
+void Simulator::stepNRecord(int n, int stateIndex, Eigen::Ref<Eigen::VectorXd> out) {
+  if (n < 0) {
+    throw std::invalid_argument("Step count must be non-negative, got " +
+                                std::to_string(n));
+  }
+  if (stateIndex < 0 || static_cast<size_t>(stateIndex) >= state.size()) {
+    throw std::out_of_range("State index " + std::to_string(stateIndex) +
+                            " out of bounds for state vector of size " +
+                            std::to_string(state.size()));
+  }
+  if (out.size() != n) {
+    throw std::invalid_argument("Output buffer size (" + std::to_string(out.size()) +
+                                ") must match step count (" + std::to_string(n) + ")");
+  }
+
+  // Record the chosen state variable after every step
+  for (int i = 0; i < n; ++i) {
+    step();
+    out(i) = state(stateIndex);
+  }
+}
+
+std::pair<int, bool> Simulator::runUntil(int maxSteps, double tolerance,
+                                         int controllerIndex) {
+  if (maxSteps < 0) {
+    throw std::invalid_argument("Step count must be non-negative, got " +
+                                std::to_string(maxSteps));
+  }
+  if (controllerIndex < 0 ||
+      static_cast<size_t>(controllerIndex) >= controllers.size()) {
+    throw std::out_of_range("Controller index " + std::to_string(controllerIndex) +
+                            " out of bounds for " + std::to_string(controllers.size()) +
+                            " controller(s)");
+  }
+
+  // Step until the measured variable is within tolerance of the setpoint.
+  // The check runs after each step, so a simulator that starts on its
+  // setpoint still advances once. Returns the number of steps taken and
+  // whether the tolerance was met, so convergence on the last allowed step
+  // is distinguishable from running out of steps.
+  for (int i = 1; i <= maxSteps; ++i) {
+    step();
+    if (std::abs(getError(controllerIndex)) < tolerance) {
+      return {i, true};
+    }
+  }
+  return {maxSteps, false};
+}
+
+std::pair<int, double> Simulator::stepUntilSaturated(int controllerIndex, double bound,
+                                                   double tolerance, int maxSteps) {
+  if (maxSteps < 0) {
+    throw std::invalid_argument("Step count must be non-negative, got " +
+                                std::to_string(maxSteps));
+  }
+  if (controllerIndex < 0 ||
+      static_cast<size_t>(controllerIndex) >= controllers.size()) {
+    throw std::out_of_range("Controller index " + std::to_string(controllerIndex) +
+                            " out of bounds for " + std::to_string(controllers.size()) +
+                            " controller(s)");
+  }
+
+  // Step until the controller output is within tolerance of the given bound
+  // (typically its min or max output limit). Returns the number of steps
+  // taken and the output at that point.
+  int steps = 0;
+  while (steps < maxSteps) {
+    step();
+    ++steps;
+    if (std::abs(getControllerOutput(controllerIndex) - bound) < tolerance) {
+      break;
+    }
+  }
+  return {steps, getControllerOutput(controllerIndex)};
+}
+
 double Simulator::getTime() const {
   return time;
 }
 
-Eigen::VectorXd Simulator::getState() const {
+const Eigen::VectorXd &Simulator::getState() const {
   return state;
 }
 
-Eigen::VectorXd Simulator::getInputs() const {
+double Simulator::getStateScalar(int index) const {
+  if (index < 0 || static_cast<size_t>(index) >= state.size()) {
+    throw std::out_of_range("State index " + std::to_string(index) +
+                            " out of bounds for state vector of size " +
+                            std::to_string(state.size()));
+  }
+  return state(index);
+}
+
+const Eigen::VectorXd &Simulator::getInputs() const {
   return inputs;
 }
 
@@ -218,4 +329,15 @@ int Simulator::getControllerCount() const {
   return static_cast<int>(controllers.size());
 }
 
+bool Simulator::stateBitEqual(const Simulator &other) const {
+  // Compare bit patterns rather than values: reproducibility means identical
+  // doubles, so -0.0 differs from 0.0 and a NaN matches an identical NaN
+  if (state.size() != other.state.size()) {
+    return false;
+  }
+  return state.size() == 0 ||
+         std::memcmp(state.data(), other.state.data(),
+                     static_cast<size_t>(state.size()) * sizeof(double)) == 0;
+}
+
 } // namespace tank_sim
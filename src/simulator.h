@@ -5,6 +5,7 @@
 #include "stepper.h"
 #include "tank_model.h"
 #include <Eigen/src/Core/Matrix.h>
+#include <utility>
 #include <vector>
 
 namespace tank_sim {
@@ -35,14 +36,25 @@ public:
 
   void step();
 
+  // Batched stepping (n calls to step() without returning to the caller)
+  void stepN(int n);
+  Eigen::VectorXd stepNRecord(int n, int stateIndex);
+  void stepNRecord(int n, int stateIndex, Eigen::Ref<Eigen::VectorXd> out);
+  std::pair<int, bool> runUntil(int maxSteps, double tolerance,
+                                int controllerIndex);
+  std::pair<int, double> stepUntilSaturated(int controllerIndex, double bound,
+                                            double tolerance, int maxSteps);
+
   // State getters (const methods - do not modify simulator state)
   double getTime() const;
-  Eigen::VectorXd getState() const;
-  Eigen::VectorXd getInputs() const;
+  const Eigen::VectorXd &getState() const;
+  double getStateScalar(int index) const;
+  const Eigen::VectorXd &getInputs() const;
   double getSetpoint(int index) const;
   double getControllerOutput(int index) const;
   double getError(int index) const;
   int getControllerCount() const;
+  bool stateBitEqual(const Simulator &other) const;
 
   // Operator control methods
   void setInput(int index, double value);
@@ -37,6 +37,7 @@ from ._tank_sim import (
     Simulator,
     SimulatorConfig,
     TankModelParameters,
+    create_default_controller_config,
     get_version,
 )
 
@@ -71,21 +72,10 @@ def create_default_config():
     config.model_params.k_v = 1.2649
     config.model_params.max_height = 5.0
 
-    # PID controller configuration
-    controller = ControllerConfig()
-    controller.gains = PIDGains()
-    controller.gains.Kc = -1.0  # Reverse-acting for outlet valve
-    controller.gains.tau_I = 10.0  # 10 second integral time
-    controller.gains.tau_D = 1.0  # 1 second derivative time
-    controller.bias = 0.5  # Nominal valve position at setpoint
-    controller.min_output = 0.0  # Valve fully closed
-    controller.max_output = 1.0  # Valve fully open
-    controller.max_integral = 10.0  # Anti-windup limit
-    controller.measured_index = 0  # Measure tank level (state 0)
-    controller.output_index = 1  # Control valve position (input 1)
-    controller.initial_setpoint = 2.5  # Target level: 2.5 m (50%)
-
-    config.controllers = [controller]
+    # PID controller configuration, built in C++ in one call: reverse-acting
+    # (Kc=-1.0, tau_I=10 s, tau_D=1 s), bias 0.5, output limits [0, 1],
+    # anti-windup limit 10, level (state 0) -> valve (input 1), setpoint 2.5 m
+    config.controllers = [create_default_controller_config()]
 
     # Initial conditions at steady state
     # CRITICAL: These values satisfy the steady-state constraint where q_out = q_in
@@ -115,4 +105,5 @@ __all__ = [
     "TankModelParameters",
     "PIDGains",
     "create_default_config",
+    "create_default_controller_config",
 ]
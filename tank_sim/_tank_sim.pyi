@@ -1,5 +1,7 @@
 """Type stubs for the C++ extension module."""
 
+from typing import overload
+
 import numpy as np
 import numpy.typing as npt
 
@@ -27,21 +29,45 @@ class SimulatorConfig:
     model_params: TankModelParameters
     controllers: list[ControllerConfig]
     dt: float
-    initial_state: npt.NDArray[np.float64]
-    initial_inputs: npt.NDArray[np.float64]
+    # The setters convert any array-like (other dtypes, strided views) to a
+    # float64 copy; the getters always return float64 arrays
+    @property
+    def initial_state(self) -> npt.NDArray[np.float64]: ...
+    @initial_state.setter
+    def initial_state(self, value: npt.ArrayLike) -> None: ...
+    @property
+    def initial_inputs(self) -> npt.NDArray[np.float64]: ...
+    @initial_inputs.setter
+    def initial_inputs(self, value: npt.ArrayLike) -> None: ...
 
 class Simulator:
     def __init__(self, config: SimulatorConfig) -> None: ...
     def step(self) -> None: ...
+    def step_n(self, n: int) -> None: ...
+    @overload
+    def step_n_record(self, n: int, state_index: int) -> npt.NDArray[np.float64]: ...
+    @overload
+    def step_n_record(
+        self, n: int, state_index: int, out: npt.NDArray[np.float64]
+    ) -> None: ...
+    def run_until(
+        self, max_steps: int, tol: float, controller_index: int
+    ) -> tuple[int, bool]: ...
+    def step_until_saturated(
+        self, controller_index: int, bound: float, tol: float, max_steps: int
+    ) -> tuple[int, float]: ...
     def reset(self) -> None: ...
     def get_state(self) -> npt.NDArray[np.float64]: ...
+    def get_state_scalar(self, index: int) -> float: ...
     def get_inputs(self) -> npt.NDArray[np.float64]: ...
     def get_time(self) -> float: ...
     def get_setpoint(self, index: int) -> float: ...
     def get_error(self, index: int) -> float: ...
     def get_controller_output(self, index: int) -> float: ...
+    def state_bit_equal(self, other: Simulator) -> bool: ...
     def set_setpoint(self, index: int, value: float) -> None: ...
     def set_input(self, index: int, value: float) -> None: ...
     def set_controller_gains(self, index: int, gains: PIDGains) -> None: ...
 
+def create_default_controller_config() -> ControllerConfig: ...
 def get_version() -> str: ...
@@ -6,13 +6,14 @@ import pytest
 import tank_sim
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def default_config():
     """Standard steady-state configuration for testing.
 
     Returns a SimulatorConfig pre-configured with typical tank and controller
     parameters at steady state. This ensures consistent test conditions across
-    all test functions.
+    all test functions. The config is only read by Simulator construction, so
+    it is built once per session; tests must not mutate it.
 
     Returns:
         tank_sim.SimulatorConfig: Configuration with parameters:
@@ -31,7 +32,10 @@ def steady_state_simulator(default_config):
 
     Creates a fresh Simulator instance with the default configuration.
     This fixture is function-scoped, so each test gets its own simulator
-    instance with clean initial conditions.
+    instance with clean initial conditions. Construction copies the
+    session-scoped config on the C++ side, so no Python property writes are
+    repeated per test. A shared simulator with reset() would not do: reset()
+    keeps any gains a test installed with set_controller_gains().
 
     Args:
         default_config: The default_config fixture providing SimulatorConfig.
@@ -21,6 +21,11 @@ import pytest
 
 import tank_sim
 
+# Steady-state initial conditions shared by the hand-built configs. The config
+# setters copy into their own Eigen vectors, so one array serves every test.
+INITIAL_STATE = np.array([2.5])
+INITIAL_INPUTS = np.array([1.0, 0.5])
+
 
 class TestConfigurationCreation:
     """Tests for creating and configuring simulator components."""
@@ -92,6 +97,29 @@ class TestConfigurationCreation:
         assert controller.output_index == 1
         assert controller.initial_setpoint == 2.5
 
+    def test_default_controller_config(self):
+        """Verify create_default_controller_config() fills in every field.
+
+        Each call must return an independent object so tests can override
+        single fields without affecting each other.
+        """
+        controller = tank_sim.create_default_controller_config()
+
+        assert controller.gains.Kc == -1.0
+        assert controller.gains.tau_I == 10.0
+        assert controller.gains.tau_D == 1.0
+        assert controller.bias == 0.5
+        assert controller.min_output == 0.0
+        assert controller.max_output == 1.0
+        assert controller.max_integral == 10.0
+        assert controller.measured_index == 0
+        assert controller.output_index == 1
+        assert controller.initial_setpoint == 2.5
+
+        controller.initial_setpoint = 3.0
+        other = tank_sim.create_default_controller_config()
+        assert other.initial_setpoint == 2.5
+
     def test_simulator_config_creation(self):
         """Verify SimulatorConfig can be created with all components.
 
@@ -107,24 +135,13 @@ class TestConfigurationCreation:
         config.model_params.max_height = 5.0
 
         # Set controller
-        controller = tank_sim.ControllerConfig()
-        controller.gains = tank_sim.PIDGains()
-        controller.gains.Kc = -1.0
-        controller.gains.tau_I = 10.0
-        controller.gains.tau_D = 1.0
-        controller.bias = 0.5
-        controller.min_output = 0.0
-        controller.max_output = 1.0
-        controller.max_integral = 10.0
-        controller.measured_index = 0
-        controller.output_index = 1
-        controller.initial_setpoint = 2.5
+        controller = tank_sim.create_default_controller_config()
 
         config.controllers = [controller]
 
         # Set initial conditions
-        config.initial_state = np.array([2.5])
-        config.initial_inputs = np.array([1.0, 0.5])
+        config.initial_state = INITIAL_STATE
+        config.initial_inputs = INITIAL_INPUTS
         config.dt = 1.0
 
         # Verify state is numpy array (not Python list)
@@ -179,16 +196,14 @@ class TestSteadyStateStability:
         """
         sim = steady_state_simulator
 
-        # Run 100 steps at steady state
-        for i in range(100):
-            sim.step()
-            state = sim.get_state()
-            level = state[0]
+        # Run 100 steps at steady state, recording the level after each
+        levels = np.empty(100)
+        sim.step_n_record(100, 0, levels)
 
-            # Level should remain at initial setpoint within tolerance
-            assert abs(level - 2.5) < 0.01, (
-                f"Level drifted to {level:.4f} m after {i + 1} steps (tolerance: 0.01 m)"
-            )
+        # Level should remain at initial setpoint within tolerance
+        np.testing.assert_allclose(
+            levels, 2.5, atol=0.01, err_msg="Level drifted from steady state"
+        )
 
         # Verify time tracking
         time = sim.get_time()
@@ -205,8 +220,7 @@ class TestSteadyStateStability:
         initial_error = sim.get_error(0)
 
         # Run for 50 steps
-        for _ in range(50):
-            sim.step()
+        sim.step_n(50)
 
         # Controller output and error should remain essentially constant
         final_output = sim.get_controller_output(0)
@@ -238,13 +252,15 @@ class TestStepResponse:
         # Change setpoint from 2.5 m to 3.0 m
         sim.set_setpoint(0, 3.0)
 
-        # Run for 200 steps
-        for _ in range(200):
-            sim.step()
+        # The level should first come within 5 mm of the setpoint inside 200 steps
+        steps, converged = sim.run_until(200, 0.005, 0)
+        assert converged, "Level should reach the new setpoint within 200 steps"
+
+        # Finish the 200-step run so overshoot after the first crossing counts
+        sim.step_n(200 - steps)
 
         # Verify level increases toward setpoint
-        state = sim.get_state()
-        level = state[0]
+        level = sim.get_state_scalar(0)
         assert level > 2.5, "Level should increase after setpoint increase"
         assert level < 3.1, "Level should not overshoot significantly"
 
@@ -269,13 +285,15 @@ class TestStepResponse:
         # Change setpoint from 2.5 m to 2.0 m
         sim.set_setpoint(0, 2.0)
 
-        # Run for 200 steps
-        for _ in range(200):
-            sim.step()
+        # The level should first come within 5 mm of the setpoint inside 200 steps
+        steps, converged = sim.run_until(200, 0.005, 0)
+        assert converged, "Level should reach the new setpoint within 200 steps"
+
+        # Finish the 200-step run so overshoot after the first crossing counts
+        sim.step_n(200 - steps)
 
         # Verify level decreases toward setpoint
-        state = sim.get_state()
-        level = state[0]
+        level = sim.get_state_scalar(0)
         assert level < 2.5, "Level should decrease after setpoint decrease"
         assert level > 1.9, "Level should not undershoot significantly"
 
@@ -299,20 +317,18 @@ class TestDisturbanceRejection:
         sim = steady_state_simulator
 
         # Run 50 steps to establish baseline
-        for _ in range(50):
-            sim.step()
+        sim.step_n(50)
 
-        level_before = sim.get_state()[0]
+        level_before = sim.get_state_scalar(0)
 
         # Apply disturbance: increase inlet flow from 1.0 to 1.2 m³/s
         sim.set_input(0, 1.2)
 
         # Run 200 steps for controller to respond
-        for _ in range(200):
-            sim.step()
+        sim.step_n(200)
 
         # Verify level returns to setpoint despite disturbance
-        level_after = sim.get_state()[0]
+        level_after = sim.get_state_scalar(0)
         assert abs(level_after - 2.5) < 0.1, (
             f"Level should return to setpoint (2.5 m), got {level_after:.3f} m"
         )
@@ -331,15 +347,13 @@ class TestResetFunctionality:
         sim = tank_sim.Simulator(default_config)
 
         # Run 50 steps
-        for _ in range(50):
-            sim.step()
+        sim.step_n(50)
 
         # Change setpoint
         sim.set_setpoint(0, 3.5)
 
         # Run 50 more steps (system now in transient)
-        for _ in range(50):
-            sim.step()
+        sim.step_n(50)
 
         # Record state before reset
         time_before_reset = sim.get_time()
@@ -369,35 +383,29 @@ class TestResetFunctionality:
         sim2 = tank_sim.Simulator(default_config)
 
         # Run sim1 for a while
-        for _ in range(50):
-            sim1.step()
+        sim1.step_n(50)
 
         # Run sim2 for same number of steps without any changes
-        for _ in range(50):
-            sim2.step()
+        sim2.step_n(50)
 
-        # Verify states match
-        state1 = sim1.get_state()
-        state2 = sim2.get_state()
-        assert np.allclose(state1, state2), (
+        # Verify states match bit for bit
+        assert sim1.state_bit_equal(sim2), (
             "States should be identical after same number of steps"
         )
 
         # Make some changes to sim1
         sim1.set_setpoint(0, 3.0)
 
-        # Reset sim1
+        # Reset both; sim2 replays the same 50 steps from the start
         sim1.reset()
+        sim2.reset()
 
         # Run both for 50 more steps
-        for _ in range(50):
-            sim1.step()
-            sim2.step()
+        sim1.step_n(50)
+        sim2.step_n(50)
 
         # Verify states still match (behavior is reproducible)
-        state1 = sim1.get_state()
-        state2 = sim2.get_state()
-        assert np.allclose(state1, state2), (
+        assert sim1.state_bit_equal(sim2), (
             "Behavior should be reproducible after reset"
         )
 
@@ -405,39 +413,32 @@ class TestResetFunctionality:
 class TestExceptionHandling:
     """Tests for proper error handling."""
 
-    def test_invalid_configuration_raises_error(self):
+    @pytest.mark.parametrize(
+        "mutate, exc",
+        [
+            pytest.param(
+                lambda c: setattr(c, "initial_state", np.array([])),
+                ValueError,
+                id="empty_state",
+            ),
+            pytest.param(
+                lambda c: setattr(c, "initial_inputs", np.array([1.0])),
+                (ValueError, RuntimeError),
+                id="short_inputs",
+            ),
+        ],
+    )
+    def test_invalid_configuration_raises_error(self, mutate, exc):
         """Verify invalid configuration raises appropriate exception.
 
-        An empty state vector should raise ValueError from std::invalid_argument.
+        Each case starts from the default configuration and breaks one field.
+        The C++ constructor rejects it with std::invalid_argument, which
+        pybind11 translates to ValueError.
         """
-        config = tank_sim.SimulatorConfig()
-        config.model_params = tank_sim.TankModelParameters()
-        config.model_params.area = 120.0
-        config.model_params.k_v = 1.2649
-        config.model_params.max_height = 5.0
-
-        controller = tank_sim.ControllerConfig()
-        controller.gains = tank_sim.PIDGains()
-        controller.gains.Kc = -1.0
-        controller.gains.tau_I = 10.0
-        controller.gains.tau_D = 1.0
-        controller.bias = 0.5
-        controller.min_output = 0.0
-        controller.max_output = 1.0
-        controller.max_integral = 10.0
-        controller.measured_index = 0
-        controller.output_index = 1
-        controller.initial_setpoint = 2.5
-
-        config.controllers = [controller]
-
-        # Empty state vector should be invalid
-        config.initial_state = np.array([])
-        config.initial_inputs = np.array([1.0, 0.5])
-        config.dt = 1.0
+        config = tank_sim.create_default_config()
+        mutate(config)
 
-        # Should raise ValueError from std::invalid_argument
-        with pytest.raises(ValueError):
+        with pytest.raises(exc):
             tank_sim.Simulator(config)
 
     def test_invalid_controller_index_raises_error(self, steady_state_simulator):
@@ -490,6 +491,63 @@ class TestNumpyArrayConversion:
         # Verify shape
         assert inputs.shape == (2,), "Inputs should have shape (2,)"
 
+    def test_initial_state_copies_buffer(self):
+        """Verify initial_state copies strided and non-float64 arrays on assignment."""
+        config = tank_sim.SimulatorConfig()
+
+        source = np.array([2.5, 0.0, 3.0])
+        config.initial_state = source[::2]  # Non-contiguous float64 view
+        source[0] = 0.0
+        assert config.initial_state.tolist() == [2.5, 3.0]
+
+        config.initial_inputs = np.array([1, 0], dtype=np.int64)
+        assert config.initial_inputs.dtype == np.float64
+        assert config.initial_inputs.tolist() == [1.0, 0.0]
+
+    def test_get_state_is_read_only_view(self, steady_state_simulator):
+        """Verify get_state() returns a read-only view that tracks the simulator."""
+        sim = steady_state_simulator
+        sim.set_setpoint(0, 3.0)
+
+        state = sim.get_state()
+        assert not state.flags.writeable, "State view should be read-only"
+        with pytest.raises(ValueError):
+            state[0] = 1.0
+
+        # The view follows later steps; copy() takes a snapshot
+        snapshot = state.copy()
+        sim.step_n(10)
+        assert state[0] == sim.get_state()[0]
+        assert state[0] != snapshot[0]
+
+    def test_get_state_scalar(self, steady_state_simulator):
+        """Verify get_state_scalar() returns a plain float matching get_state()."""
+        sim = steady_state_simulator
+        sim.step_n(10)
+
+        level = sim.get_state_scalar(0)
+        assert type(level) is float, "get_state_scalar() should return a Python float"
+        assert level == sim.get_state()[0]
+
+        with pytest.raises(IndexError):
+            sim.get_state_scalar(1)
+
+    def test_step_n_record_into_buffer(self, steady_state_simulator):
+        """Verify step_n_record() writes into a caller-provided float64 array."""
+        sim = steady_state_simulator
+        sim.set_setpoint(0, 3.0)
+
+        levels = np.empty(20)
+        sim.step_n_record(20, 0, levels)
+        assert levels[-1] == sim.get_state_scalar(0)
+        assert levels[0] < levels[-1], "Level should rise toward the new setpoint"
+
+        # The buffer must match the step count and be writable float64
+        with pytest.raises(ValueError):
+            sim.step_n_record(10, 0, np.empty(5))
+        with pytest.raises(TypeError):
+            sim.step_n_record(5, 0, np.empty(5, dtype=np.int64))
+
     def test_initial_state_as_numpy_array(self, default_config):
         """Verify initial_state in config accepts numpy arrays."""
         # Create with explicit numpy array
@@ -499,18 +557,7 @@ class TestNumpyArrayConversion:
         config.model_params.k_v = 1.2649
         config.model_params.max_height = 5.0
 
-        controller = tank_sim.ControllerConfig()
-        controller.gains = tank_sim.PIDGains()
-        controller.gains.Kc = -1.0
-        controller.gains.tau_I = 10.0
-        controller.gains.tau_D = 1.0
-        controller.bias = 0.5
-        controller.min_output = 0.0
-        controller.max_output = 1.0
-        controller.max_integral = 10.0
-        controller.measured_index = 0
-        controller.output_index = 1
-        controller.initial_setpoint = 2.5
+        controller = tank_sim.create_default_controller_config()
 
         config.controllers = [controller]
 
@@ -536,8 +583,7 @@ class TestDynamicRetuning:
         sim = steady_state_simulator
 
         # Run initial 50 steps with original gains (Kc=-1.0)
-        for _ in range(50):
-            sim.step()
+        sim.step_n(50)
 
         initial_state = sim.get_state().copy()
 
@@ -545,13 +591,12 @@ class TestDynamicRetuning:
         sim.set_setpoint(0, 3.0)
 
         # Run 50 steps with original tuning
-        states_original = []
-        for _ in range(50):
-            sim.step()
-            states_original.append(sim.get_state()[0])
+        states_original = np.empty(50)
+        sim.step_n_record(50, 0, states_original)
 
         # Record response with original gains
-        response_original = sim.get_state()[0]
+        response_original = states_original[-1]
+        assert response_original == sim.get_state_scalar(0)
 
         # Now retune controller with different gains (more aggressive)
         new_gains = tank_sim.PIDGains()
@@ -565,12 +610,10 @@ class TestDynamicRetuning:
         sim.reset()
         sim.set_setpoint(0, 3.0)
 
-        states_new = []
-        for _ in range(50):
-            sim.step()
-            states_new.append(sim.get_state()[0])
+        states_new = np.empty(50)
+        sim.step_n_record(50, 0, states_new)
 
-        response_new = sim.get_state()[0]
+        response_new = states_new[-1]
 
         # Verify that new gains produce different response
         # (Higher Kc should produce faster, more aggressive response)
@@ -591,41 +634,27 @@ class TestIntegration:
         config.model_params.k_v = 1.0
         config.model_params.max_height = 5.0
 
-        controller = tank_sim.ControllerConfig()
-        controller.gains = tank_sim.PIDGains()
-        controller.gains.Kc = -1.0
-        controller.gains.tau_I = 10.0
-        controller.gains.tau_D = 1.0
-        controller.bias = 0.5
-        controller.min_output = 0.0
-        controller.max_output = 1.0
-        controller.max_integral = 10.0
-        controller.measured_index = 0
-        controller.output_index = 1
-        controller.initial_setpoint = 2.5
+        controller = tank_sim.create_default_controller_config()
 
         config.controllers = [controller]
-        config.initial_state = np.array([2.5])
-        config.initial_inputs = np.array([1.0, 0.5])
+        config.initial_state = INITIAL_STATE
+        config.initial_inputs = INITIAL_INPUTS
         config.dt = 0.5  # Smaller timestep
 
         sim = tank_sim.Simulator(config)
 
         # Phase 1: Establish steady state (100 steps)
-        for _ in range(100):
-            sim.step()
+        sim.step_n(100)
         assert abs(sim.get_time() - 50.0) < 1e-6
 
         # Phase 2: Step response (100 steps at new setpoint)
         sim.set_setpoint(0, 3.0)
-        for _ in range(100):
-            sim.step()
+        sim.step_n(100)
         assert abs(sim.get_time() - 100.0) < 1e-6
 
         # Phase 3: Disturbance rejection (100 steps)
         sim.set_input(0, 1.2)
-        for _ in range(100):
-            sim.step()
+        sim.step_n(100)
 
         # Verify system is still stable
         state = sim.get_state()
@@ -637,8 +666,7 @@ class TestIntegration:
         sim = tank_sim.Simulator(config)
 
         # Run a complete simulation cycle
-        for _ in range(100):
-            sim.step()
+        sim.step_n(100)
 
         # Verify it works as expected
         assert sim.get_time() > 0.0
@@ -666,16 +694,15 @@ class TestEdgeCases:
         config.controllers = []
 
         # Initial conditions
-        config.initial_state = np.array([2.5])
-        config.initial_inputs = np.array([1.0, 0.5])  # Fixed inlet/valve
+        config.initial_state = INITIAL_STATE
+        config.initial_inputs = INITIAL_INPUTS  # Fixed inlet/valve
         config.dt = 1.0
 
         # Should create simulator successfully
         sim = tank_sim.Simulator(config)
 
         # Run open-loop simulation
-        for _ in range(50):
-            sim.step()
+        sim.step_n(50)
 
         # Verify simulator ran
         assert sim.get_time() == 50.0
@@ -693,45 +720,26 @@ class TestEdgeCases:
     def test_zero_timestep_raises_error(self):
         """Verify zero timestep is rejected during configuration.
 
-        A zero timestep would cause division by zero in the integrator.
+        A zero timestep would cause division by zero in the integrator, so the
+        constructor throws std::invalid_argument (ValueError in Python).
         """
         config = tank_sim.create_default_config()
         config.dt = 0.0
 
-        # Should raise an error (implementation-dependent)
-        # If C++ allows it, the simulation would fail on first step
-        try:
-            sim = tank_sim.Simulator(config)
-            # If construction succeeds, step should fail
-            with pytest.raises(Exception):
-                sim.step()
-        except Exception:
-            # Construction failed as expected
-            pass
+        with pytest.raises(ValueError, match="dt must be positive"):
+            tank_sim.Simulator(config)
 
     def test_negative_timestep(self):
-        """Verify negative timestep behavior.
+        """Verify negative timestep is rejected during configuration.
 
-        Negative timesteps don't make physical sense but should be handled
-        gracefully (either rejected or treated as forward integration).
+        Negative timesteps don't make physical sense; the constructor rejects
+        them with the same dt validation as a zero timestep.
         """
         config = tank_sim.create_default_config()
         config.dt = -1.0
 
-        # Behavior depends on implementation
-        # Document what actually happens
-        try:
-            sim = tank_sim.Simulator(config)
-            # If allowed, step and observe behavior
-            initial_time = sim.get_time()
-            sim.step()
-            final_time = sim.get_time()
-
-            # Time should either increase (abs value used) or decrease
-            assert final_time != initial_time
-        except Exception:
-            # Rejection is also acceptable
-            pass
+        with pytest.raises(ValueError, match="dt must be positive"):
+            tank_sim.Simulator(config)
 
     def test_extreme_setpoint_causing_saturation(self):
         """Verify controller handles impossible setpoints gracefully.
@@ -747,19 +755,21 @@ class TestEdgeCases:
         # With reverse-acting controller (Kc < 0), positive error closes valve
         sim.set_setpoint(0, 10.0)  # 10 m level (max is 5 m)
 
-        # Run simulation
-        for _ in range(100):
-            sim.step()
-
         # Valve should be saturated at minimum (closed) due to reverse action
         # Large positive error → negative controller output → saturates at min_output (0.0)
-        valve_position = sim.get_controller_output(0)
+        steps, valve_position = sim.step_until_saturated(0, 0.0, 0.01, 100)
         assert abs(valve_position - 0.0) < 0.01, "Valve should saturate at 0% (closed)"
 
+        # Hold the setpoint for the rest of the 100 s; the valve stays closed
+        sim.step_n(100 - steps)
+        assert abs(sim.get_controller_output(0) - 0.0) < 0.01, (
+            "Valve should stay saturated at 0% (closed)"
+        )
+
         # Level should rise as outlet flow is reduced
-        state = sim.get_state()
-        assert state[0] > 2.5, "Level should have risen with closed valve"
-        assert state[0] < 5.0, "Level cannot exceed max tank height"
+        level = sim.get_state_scalar(0)
+        assert level > 2.5, "Level should have risen with closed valve"
+        assert level < 5.0, "Level cannot exceed max tank height"
 
     def test_very_low_setpoint_causing_valve_opening(self):
         """Verify controller handles very low setpoint (valve opening).
@@ -774,41 +784,20 @@ class TestEdgeCases:
         # With reverse-acting controller (Kc < 0), negative error opens valve
         sim.set_setpoint(0, 0.1)  # 0.1 m level (near empty)
 
-        # Run simulation
-        for _ in range(100):
-            sim.step()
-
         # Valve should be saturated at maximum (fully open) due to reverse action
         # Large negative error → positive controller output → saturates at max_output (1.0)
-        valve_position = sim.get_controller_output(0)
+        steps, valve_position = sim.step_until_saturated(0, 1.0, 0.01, 100)
         assert abs(valve_position - 1.0) < 0.01, (
             "Valve should saturate at 100% (fully open)"
         )
 
-        # Level should drop significantly with fully open valve
-        state = sim.get_state()
-        assert state[0] < 2.0, "Level should have dropped"
-        assert state[0] > 0.0, "Level should remain positive"
-
-    def test_empty_state_vector(self):
-        """Verify empty state vector is rejected.
-
-        A simulator with no state variables makes no sense.
-        """
-        config = tank_sim.create_default_config()
-        config.initial_state = np.array([])
-
-        with pytest.raises((ValueError, RuntimeError)):
-            tank_sim.Simulator(config)
-
-    def test_mismatched_input_dimensions(self):
-        """Verify mismatched input vector dimensions are caught.
-
-        The initial_inputs must match the expected input dimension
-        (typically 2: inlet flow and valve position).
-        """
-        config = tank_sim.create_default_config()
-        config.initial_inputs = np.array([1.0])  # Too short
+        # Hold the setpoint for the rest of the 100 s; the valve stays open
+        sim.step_n(100 - steps)
+        assert abs(sim.get_controller_output(0) - 1.0) < 0.01, (
+            "Valve should stay saturated at 100% (fully open)"
+        )
 
-        with pytest.raises((ValueError, RuntimeError)):
-            tank_sim.Simulator(config)
+        # Level should drop significantly with fully open valve
+        level = sim.get_state_scalar(0)
+        assert level < 2.0, "Level should have dropped"
+        assert level > 0.0, "Level should remain positive"
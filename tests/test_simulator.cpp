@@ -23,6 +23,7 @@
 #include <gtest/gtest.h>
 #include <Eigen/Dense>
 #include <cmath>
+#include <limits>
 #include "../src/simulator.h"
 #include "../src/constants.h"
 
@@ -402,6 +403,116 @@ TEST_F(SimulatorTest, TimeAdvancement) {
     EXPECT_EQ(sim.getTime(), 10.0);
 }
 
+// Test: Batched stepping matches repeated step() calls
+TEST_F(SimulatorTest, StepNMatchesRepeatedStep) {
+    Simulator::Config config = createSteadyStateConfig(3.0);
+    Simulator sim_loop(config);
+    Simulator sim_batch(config);
+
+    for (int i = 0; i < 50; ++i) {
+        sim_loop.step();
+    }
+    sim_batch.stepN(50);
+
+    EXPECT_EQ(sim_batch.getTime(), sim_loop.getTime());
+    EXPECT_EQ(sim_batch.getState()(0), sim_loop.getState()(0));
+    EXPECT_EQ(sim_batch.getControllerOutput(0), sim_loop.getControllerOutput(0));
+
+    // Zero steps is a no-op, negative counts are rejected
+    sim_batch.stepN(0);
+    EXPECT_EQ(sim_batch.getTime(), 50.0);
+    EXPECT_THROW(sim_batch.stepN(-1), std::invalid_argument);
+}
+
+// Test: Batched stepping records the requested state after every step
+TEST_F(SimulatorTest, StepNRecordTracksState) {
+    Simulator::Config config = createSteadyStateConfig(3.0);
+    Simulator sim_loop(config);
+    Simulator sim_batch(config);
+
+    Eigen::VectorXd levels = sim_batch.stepNRecord(20, 0);
+    ASSERT_EQ(levels.size(), 20);
+
+    for (int i = 0; i < 20; ++i) {
+        sim_loop.step();
+        EXPECT_EQ(levels(i), sim_loop.getState()(0));
+    }
+    EXPECT_EQ(sim_batch.getTime(), 20.0);
+
+    EXPECT_THROW(sim_batch.stepNRecord(5, 1), std::out_of_range);
+    EXPECT_THROW(sim_batch.stepNRecord(-1, 0), std::invalid_argument);
+}
+
+// Test: runUntil stops at the first step within tolerance of the setpoint
+TEST_F(SimulatorTest, RunUntilStopsWhenConverged) {
+    Simulator::Config config = createSteadyStateConfig(3.0);
+    Simulator sim(config);
+    Simulator sim_loop(config);
+
+    auto [steps, converged] = sim.runUntil(500, 0.005, 0);
+    ASSERT_TRUE(converged);
+    ASSERT_GT(steps, 0);
+    ASSERT_LE(steps, 500);
+    EXPECT_LT(std::abs(sim.getError(0)), 0.005);
+    EXPECT_EQ(sim.getTime(), steps * TEST_DT);
+
+    // Stepping one at a time reaches tolerance on the same step
+    int loop_steps = 0;
+    do {
+        sim_loop.step();
+        ++loop_steps;
+    } while (std::abs(sim_loop.getError(0)) >= 0.005);
+    EXPECT_EQ(loop_steps, steps);
+
+    // An unreachable tolerance runs the full budget and reports no convergence
+    EXPECT_EQ(sim.runUntil(10, 0.0, 0), std::make_pair(10, false));
+
+    EXPECT_THROW(sim.runUntil(10, 0.005, 1), std::out_of_range);
+    EXPECT_THROW(sim.runUntil(-1, 0.005, 0), std::invalid_argument);
+}
+
+// Test: stateBitEqual compares bit patterns, not values
+TEST_F(SimulatorTest, StateBitEqualComparesBits) {
+    Simulator::Config config = createSteadyStateConfig();
+    EXPECT_TRUE(Simulator(config).stateBitEqual(Simulator(config)));
+
+    // -0.0 == 0.0 as values, but the sign bit differs
+    config.initialState(0) = 0.0;
+    Simulator positive_zero(config);
+    config.initialState(0) = -0.0;
+    Simulator negative_zero(config);
+    EXPECT_FALSE(positive_zero.stateBitEqual(negative_zero));
+
+    // NaN != NaN as values, but identical NaNs have identical bits
+    config.initialState(0) = std::numeric_limits<double>::quiet_NaN();
+    Simulator nan_a(config);
+    Simulator nan_b(config);
+    EXPECT_TRUE(nan_a.stateBitEqual(nan_b));
+}
+
+// Test: getState()/getInputs() references stay valid across step() and reset()
+TEST_F(SimulatorTest, StateReferencesTrackSimulator) {
+    Simulator::Config config = createSteadyStateConfig(3.0);
+    Simulator sim(config);
+
+    // The Python bindings hand out read-only views of these buffers
+    const Eigen::VectorXd& state = sim.getState();
+    const Eigen::VectorXd& inputs = sim.getInputs();
+    const double* state_data = state.data();
+    const double* inputs_data = inputs.data();
+
+    sim.stepN(10);
+    EXPECT_EQ(sim.getState().data(), state_data);
+    EXPECT_EQ(sim.getInputs().data(), inputs_data);
+    EXPECT_GT(state(0), TANK_NOMINAL_HEIGHT);
+
+    sim.reset();
+    EXPECT_EQ(sim.getState().data(), state_data);
+    EXPECT_EQ(sim.getInputs().data(), inputs_data);
+    EXPECT_EQ(state(0), TANK_NOMINAL_HEIGHT);
+    EXPECT_EQ(inputs(1), TEST_VALVE_POSITION);
+}
+
 // Test: Getter Methods
 TEST_F(SimulatorTest, GetterMethods) {
     Simulator::Config config = createSteadyStateConfig();